@@ -1,4 +1,5 @@
 from . import models
+from . import controllers
 
 def post_init_hook(env):
     """Initialize folder structure after module installation"""
@@ -8,17 +8,24 @@
     'data': [
         'security/ir.model.access.csv',
         'security/document_security.xml',
+        'data/ir_config_parameter.xml',
+        'data/ir_cron_data.xml',
         'views/document_upload_wizard_views.xml',
         'views/folder_wizard_views.xml',
         'views/folder_rename_wizard_views.xml',
         'views/folder_upload_wizard_views.xml',
+        'views/directory_import_wizard_views.xml',
         'views/preview_wizard_views.xml',
         'views/actions_wizard_views.xml',      
         'views/rename_wizard_views.xml',        
         'views/properties_wizard_views.xml',  
+        'views/pdf_split_wizard_views.xml',
         'views/document_views.xml',
         'views/document_list_actions.xml',
         'views/folder_management_views.xml',
+        'views/res_config_settings_views.xml',
+        'views/retention_rule_views.xml',
+        'views/perf_stat_views.xml',
         'views/menu.xml',
         'views/share_views.xml',
          'views/document_reference_wizard_views.xml',
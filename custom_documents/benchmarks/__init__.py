@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+# Benchmark harness, run from an Odoo shell; not loaded with the module.
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the custom_documents hot paths.
+
+Seeds a synthetic tree (folders with real ``_parent_store`` depth,
+documents of mixed sizes, users and share lines), times each scenario and
+writes the results as JSON so that two runs can be compared::
+
+    $ odoo-bin shell -d bench_db --no-http <<'EOF'
+    from odoo.addons.custom_documents.benchmarks import run
+    run.main(env, output='/tmp/documents-bench.json', documents=2000)
+    EOF
+
+Everything happens in the shell transaction and is rolled back at the end
+unless ``keep=True``; files written to the filestore are left to its GC.
+"""
+import base64
+import io
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime, timezone
+
+_logger = logging.getLogger(__name__)
+
+# (weight, min size, max size) of the seeded files
+SIZE_PROFILE = [
+    (70, 1024, 64 * 1024),
+    (25, 64 * 1024, 1024 * 1024),
+    (5, 1024 * 1024, 4 * 1024 * 1024),
+]
+PAGE_SIZE = 80
+BENCH_PREFIX = 'bench-'
+
+
+# -------------------------------------------------------------------------
+# Data generator
+# -------------------------------------------------------------------------
+def seed(env, folders=200, depth=6, documents=1000, users=20, shares=2000, rng_seed=42):
+    """Create the synthetic data set; return a dict of the created records."""
+    rng = random.Random(rng_seed)
+    Folder = env['custom.document.folder']
+    Document = env['custom.document']
+    company = env.company
+
+    group_user = env.ref('base.group_user')
+    bench_users = env['res.users'].with_context(no_reset_password=True, mail_create_nolog=True).create([{
+        'name': f'{BENCH_PREFIX}user {index}',
+        'login': f'{BENCH_PREFIX}user-{index}-{rng_seed}',
+        'groups_id': [(6, 0, group_user.ids)],
+    } for index in range(users)])
+
+    # Breadth-first levels so that the deepest branches reach ``depth``
+    root = Folder.create({'name': f'{BENCH_PREFIX}root', 'company_id': company.id})
+    levels = [root]
+    all_folders = root
+    while len(all_folders) < folders:
+        # once the tree is ``depth`` deep, keep widening the levels above the leaves
+        parents = levels[-1] if len(levels) < depth else levels[rng.randrange(max(depth - 1, 1))]
+        batch = Folder.create([{
+            'name': f'{BENCH_PREFIX}folder {len(all_folders) + index}',
+            'parent_id': rng.choice(parents.ids),
+            'company_id': company.id,
+        } for index in range(min(folders - len(all_folders), max(len(parents) * 2, 4)))])
+        levels.append(batch)
+        all_folders |= batch
+
+    weights = [weight for weight, _low, _high in SIZE_PROFILE]
+    owners = bench_users | env.user
+    vals_list = []
+    for index in range(documents):
+        _weight, low, high = rng.choices(SIZE_PROFILE, weights=weights)[0]
+        name = f'{BENCH_PREFIX}doc-{index}.bin'
+        vals_list.append({
+            'name': name,
+            'document_type': 'file',
+            'file': base64.b64encode(rng.randbytes(rng.randint(low, high))),
+            'file_name': name,
+            'mimetype': 'application/octet-stream',
+            'folder_id': rng.choice(all_folders.ids),
+            'user_id': rng.choice(owners.ids),
+            'share_access': rng.choice(['private', 'private', 'internal']),
+        })
+    docs = Document.browse()
+    for start in range(0, len(vals_list), 100):
+        docs |= Document.create(vals_list[start:start + 100])
+
+    pairs = {(rng.choice(docs.ids), rng.choice(bench_users.ids)) for _index in range(shares)}
+    partner_of = {user.id: user.partner_id.id for user in bench_users}
+    env['custom.document.share.line'].create([
+        {'document_id': doc_id, 'partner_id': partner_of[user_id]} for doc_id, user_id in pairs
+    ])
+    env.flush_all()
+    return {'users': bench_users, 'root': root, 'folders': all_folders, 'documents': docs}
+
+
+# -------------------------------------------------------------------------
+# Measurement
+# -------------------------------------------------------------------------
+def measure(env, name, func, repeat=5):
+    """Run ``func`` ``repeat`` times; report wall time, queries and peak memory."""
+    cr = env.cr
+    timings, queries = [], []
+    for _run in range(repeat):
+        env.invalidate_all()
+        env.registry.clear_cache()
+        count = cr.sql_log_count
+        started = time.perf_counter()
+        func()
+        env.flush_all()
+        timings.append((time.perf_counter() - started) * 1000)
+        queries.append(cr.sql_log_count - count)
+
+    # Separate pass: tracemalloc slows the code down too much to time it
+    env.invalidate_all()
+    tracemalloc.start()
+    func()
+    env.flush_all()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {
+        'name': name,
+        'runs': repeat,
+        'wall_ms': {
+            'min': round(min(timings), 2),
+            'median': round(statistics.median(timings), 2),
+            'max': round(max(timings), 2),
+        },
+        'queries': {'min': min(queries), 'max': max(queries)},
+        'peak_kib': round(peak / 1024, 1),
+    }
+    _logger.info("bench %-28s %8.2f ms %5d queries %10.1f KiB",
+                 name, result['wall_ms']['median'], queries[-1], result['peak_kib'])
+    return result
+
+
+def _zip_payload(rng, files=50):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for index in range(files):
+            archive.writestr(f'import/sub-{index % 5}/file-{index}.txt', rng.randbytes(rng.randint(512, 32 * 1024)))
+    return base64.b64encode(buffer.getvalue())
+
+
+def scenarios(env, data, rng_seed=42):
+    """Yield (name, callable) for every hot path, run as a regular user."""
+    rng = random.Random(rng_seed)
+    user = data['users'][0]
+    uenv = env(user=user.id)
+    Document = uenv['custom.document']
+    doc = data['documents'].filtered(lambda d: d.user_id == user)[:1] or data['documents'][:1]
+    zip_file = _zip_payload(rng)
+
+    yield 'search_access_domain', lambda: Document.search([], limit=PAGE_SIZE)
+    yield 'search_count_access_domain', lambda: Document.search_count([])
+    for bucket in ('my', 'shared', 'recent', 'trash'):
+        yield f'sidebar_{bucket}', (
+            lambda bucket=bucket: Document.with_context(active_test=False).search(
+                [('sidebar_category', '=', bucket)], limit=PAGE_SIZE))
+
+    def file_size_page():
+        docs = Document.search([('document_type', '=', 'file')], limit=PAGE_SIZE)
+        docs.mapped('file_size')
+    yield 'compute_file_size_page', file_size_page
+
+    def open_share_wizard():
+        Wizard = uenv['custom.document.share.wizard'].with_context(default_document_id=doc.id)
+        wizard = Wizard.create({})
+        wizard.read(list(Wizard._fields))
+    yield 'share_wizard_open', open_share_wizard
+
+    def zip_import():
+        wizard = uenv['custom.document.folder.upload.wizard'].create({
+            'upload_type': 'zip',
+            'zip_file': zip_file,
+            'zip_filename': 'bench.zip',
+            'parent_folder_id': data['root'].id,
+        })
+        wizard.action_upload()
+    yield 'zip_import_50_files', zip_import
+
+    # Same work as the share controller once the link is resolved
+    def share_download():
+        shared = doc.sudo()
+        shared._has_content()
+        shared._touch_access('download')
+        shared._get_signed_url('download') or shared._get_file_content()
+    yield 'share_download', share_download
+
+
+# -------------------------------------------------------------------------
+# Entry point
+# -------------------------------------------------------------------------
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=__file__.rsplit('/', 2)[0], check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(env, output='documents-bench.json', repeat=5, keep=False, only=None, **seed_params):
+    """Seed, run every scenario and write the JSON report to ``output``."""
+    params = dict(folders=200, depth=6, documents=1000, users=20, shares=2000, rng_seed=42)
+    params.update(seed_params)
+    started = time.perf_counter()
+    data = seed(env, **params)
+    seed_seconds = time.perf_counter() - started
+
+    results = []
+    try:
+        for name, func in scenarios(env, data, rng_seed=params['rng_seed']):
+            if only and name not in only:
+                continue
+            results.append(measure(env, name, func, repeat=repeat))
+    finally:
+        if not keep:
+            env.cr.rollback()
+        else:
+            env.cr.commit()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'database': env.cr.dbname,
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'seed': params,
+            'seed_seconds': round(seed_seconds, 2),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+    with open(output, 'w') as fileobj:
+        json.dump(report, fileobj, indent=2)
+    return report
+
+
+def compare(baseline, candidate):
+    """Print the median wall time and query deltas between two reports."""
+    with open(baseline) as fileobj:
+        before = {r['name']: r for r in json.load(fileobj)['results']}
+    with open(candidate) as fileobj:
+        after = {r['name']: r for r in json.load(fileobj)['results']}
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        old_ms, new_ms = old['wall_ms']['median'], new['wall_ms']['median']
+        delta = (new_ms - old_ms) / old_ms * 100 if old_ms else 0.0
+        print(f"{name:30} {old_ms:9.2f} -> {new_ms:9.2f} ms ({delta:+6.1f}%)  "
+              f"queries {old['queries']['max']} -> {new['queries']['max']}")
@@ -1,2 +1,6 @@
 from . import document_controller
-from . import share_controller
\ No newline at end of file
+from . import share_controller
+from . import export_controller
+from . import sync_controller
+from . import perf_controller
+from . import webdav_controller
@@ -1,17 +1,61 @@
 from odoo import http
-from odoo.http import request, content_disposition
-import base64
+from odoo.http import request, content_disposition, Response
+from werkzeug.wsgi import wrap_file
+
+from ..models.document_perf import instrument
+
+
+def image_derivative_response(document, size):
+    """Response with a resized variant of an image document, or None."""
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        return None
+    accepts_webp = 'image/webp' in request.httprequest.headers.get('Accept', '')
+    stream = document._get_image_derivative_stream(size, webp=accepts_webp)
+    if not stream:
+        return None
+    response = stream.get_response()
+    response.headers['Vary'] = 'Accept'
+    return response
 
 class DocumentPDFController(http.Controller):
     
     @http.route('/document/pdf/view/<int:document_id>', type='http', auth='user')
+    @instrument('pdf.view')
     def view_pdf(self, document_id, **kwargs):
         document = request.env['custom.document'].browse(document_id)
         if document.exists() and document.document_type == 'file' and document.mimetype == 'application/pdf':
-            pdf_data = base64.b64decode(document.file)
+            pdf_data = document._get_file_content()
+            document._touch_access('preview')
             headers = [
                 ('Content-Type', 'application/pdf'),
                 ('Content-Length', len(pdf_data)),
             ]
             return request.make_response(pdf_data, headers)
-        return request.not_found()
\ No newline at end of file
+        return request.not_found()
+
+    @http.route('/documents/content/<int:document_id>', type='http', auth='user')
+    def document_content(self, document_id, download=None, size=None, **kwargs):
+        """Serve document content from any storage tier.
+
+        ``size`` asks for an image no larger than that many pixels; a resized
+        WebP (or JPEG/PNG) variant is returned when one applies.
+        """
+        document = request.env['custom.document'].search([('id', '=', document_id)], limit=1)
+        if not document or document.document_type != 'file' or not document._has_content():
+            return request.not_found()
+        if size and not download:
+            response = image_derivative_response(document, size)
+            if response:
+                document._touch_access('preview')
+                return response
+        document._touch_access('download' if download else 'preview')
+        filename = document.file_name or document.name or 'document'
+        headers = [
+            ('Content-Type', document.mimetype or 'application/octet-stream'),
+            ('Content-Disposition', content_disposition(filename, 'attachment' if download else 'inline')),
+            ('X-Content-Type-Options', 'nosniff'),
+        ]
+        fileobj = document._open_content()
+        return Response(wrap_file(request.httprequest.environ, fileobj), headers=headers, direct_passthrough=True)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import io
+import logging
+import zipfile
+
+from odoo import http
+from odoo.http import request, content_disposition, Response
+
+from ..models.document_storage import open_content_source
+
+_logger = logging.getLogger(__name__)
+
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink handed to ZipFile; the bytes are drained by the generator.
+
+    It is not seekable, so ZipFile writes data descriptors and never needs to
+    go back over what was already sent to the client.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class DocumentExportController(http.Controller):
+
+    @http.route('/documents/zip', type='http', auth='user')
+    def download_zip(self, ids=None, folder_id=None, **kwargs):
+        """Stream a ZIP of a document selection or of a whole folder subtree."""
+        Document = request.env['custom.document']
+        if folder_id:
+            folder = request.env['custom.document.folder'].browse(int(folder_id)).exists()
+            folder = folder._filtered_access('read')
+            if not folder:
+                return request.not_found()
+            entries = Document._get_zip_entries(folder=folder)
+            filename = '%s.zip' % (folder.name or 'documents')
+        else:
+            doc_ids = [int(i) for i in (ids or '').split(',') if i.strip().isdigit()]
+            entries = Document.browse(doc_ids)._get_zip_entries()
+            filename = 'documents.zip'
+        if not entries:
+            return request.not_found()
+
+        headers = [
+            ('Content-Type', 'application/zip'),
+            ('Content-Disposition', content_disposition(filename)),
+            ('X-Content-Type-Options', 'nosniff'),
+        ]
+        return Response(self._zip_generator(entries), headers=headers, direct_passthrough=True)
+
+    def _zip_generator(self, entries):
+        """Yield the archive chunk by chunk, one file open at a time.
+
+        ``entries`` are (arcname, content source) pairs resolved beforehand,
+        as the generator runs after the request cursor has been released.
+        """
+        sink = _ZipStream()
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for arcname, source in entries:
+                try:
+                    fileobj = open_content_source(source)
+                except OSError:
+                    _logger.warning("ZIP export: skipping unreadable file %s", arcname)
+                    continue
+                with fileobj, archive.open(arcname, 'w', force_zip64=True) as target:
+                    while True:
+                        chunk = fileobj.read(ZIP_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                yield sink.drain()
+        yield sink.drain()
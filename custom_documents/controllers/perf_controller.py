@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from odoo import http, _
+from odoo.exceptions import AccessError
+from odoo.http import request
+
+from ..models.document_perf import PERF_PARAM, get_perf_stats
+
+
+class DocumentPerfController(http.Controller):
+
+    @http.route('/documents/perf/stats', type='json', auth='user')
+    def perf_stats(self, limit=None):
+        """Aggregated timings of the instrumented operations, slowest first.
+
+        The samples live in the memory of the worker answering the call, so
+        with several workers they only cover the calls that worker served;
+        ``worker_pid`` tells which one it was.
+        """
+        if not request.env.user.has_group('base.group_system'):
+            raise AccessError(_('Only administrators can read the performance statistics.'))
+        stats = get_perf_stats(request.db, slowest=int(limit or 20))
+        stats['enabled'] = bool(request.env['ir.config_parameter'].sudo().get_param(PERF_PARAM))
+        return stats
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+
+class DocumentSyncController(http.Controller):
+
+    @http.route('/documents/changes', type='json', auth='user')
+    def changes(self, cursor=None, folder_id=None, limit=None):
+        """Delta feed for sync clients.
+
+        Call without a cursor to get the current head (after a full listing),
+        then poll with the returned cursor until ``has_more`` is false. The
+        cursor is an opaque string; an older integer cursor asks for a reset.
+        """
+        folder = None
+        if folder_id:
+            folder = request.env['custom.document.folder'].search([('id', '=', int(folder_id))], limit=1)
+            if not folder:
+                return {'error': 'folder_not_found'}
+        return request.env['custom.document.change']._get_changes(
+            cursor=cursor, folder=folder, limit=limit,
+        )
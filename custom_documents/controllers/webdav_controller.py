@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+import logging
+from urllib.parse import quote, unquote, urlparse
+
+from lxml import etree
+from werkzeug.http import http_date
+from werkzeug.wsgi import wrap_file
+
+from odoo import http
+from odoo.exceptions import AccessError, UserError, ValidationError
+from odoo.http import request, Response
+from odoo.osv import expression
+
+_logger = logging.getLogger(__name__)
+
+DAV_PREFIX = '/documents/dav'
+DAV_NS = 'DAV:'
+DAV_METHODS = ['OPTIONS', 'PROPFIND', 'GET', 'HEAD', 'PUT', 'MKCOL', 'DELETE', 'MOVE']
+
+
+def _dav(tag):
+    return '{%s}%s' % (DAV_NS, tag)
+
+
+class DocumentWebDAVController(http.Controller):
+    """WebDAV (class 1) view of the folder tree: folders are collections,
+    file documents are resources. Access goes through the same rules as
+    the backend; clients authenticate with login + API key (Basic auth)."""
+
+    @http.route([DAV_PREFIX, DAV_PREFIX + '/<path:path>'], type='http', auth='public',
+                methods=DAV_METHODS, csrf=False, save_session=False)
+    def dav(self, path='', **kwargs):
+        if not self._authenticate():
+            return Response(status=401, headers=[('WWW-Authenticate', 'Basic realm="Documents"')])
+        method = request.httprequest.method
+        parts = [unquote(p) for p in path.split('/') if p]
+        handler = getattr(self, '_dav_%s' % method.lower())
+        try:
+            return handler(parts)
+        except AccessError:
+            return Response(status=403)
+        except (UserError, ValidationError) as e:
+            _logger.info("WebDAV %s /%s refused: %s", method, '/'.join(parts), e)
+            return Response(status=409)
+
+    # ---------------------------------------------------------------------
+    # Authentication & resolution
+    # ---------------------------------------------------------------------
+
+    def _authenticate(self):
+        if request.session.uid:
+            return True
+        auth = request.httprequest.authorization
+        if not auth or auth.type != 'basic' or not auth.password:
+            return False
+        uid = request.env['res.users.apikeys']._check_credentials(scope='rpc', key=auth.password)
+        if not uid:
+            return False
+        user = request.env['res.users'].sudo().browse(uid)
+        if user.login != auth.username:
+            return False
+        request.update_env(user=uid)
+        return True
+
+    def _find_folder(self, parts):
+        """Folder whose full path is ``parts``, walked segment by segment by parent."""
+        if not parts:
+            return None
+        return request.env['custom.document.folder']._resolve_path(parts, create=False)
+
+    def _find_document(self, folder, name):
+        return request.env['custom.document'].search([
+            ('folder_id', '=', folder.id if folder else False),
+            ('document_type', '=', 'file'),
+            '|', ('file_name', '=', name), ('name', '=', name),
+        ], limit=1)
+
+    def _resolve(self, parts):
+        """Return (folder, document); both empty means not found, (None, None) is the root."""
+        if not parts:
+            return None, None
+        folder = self._find_folder(parts)
+        if folder:
+            return folder, None
+        parent = self._find_folder(parts[:-1])
+        if parts[:-1] and not parent:
+            return False, False
+        doc = self._find_document(parent, parts[-1])
+        return (False, doc) if doc else (False, False)
+
+    def _href(self, parts, collection=False):
+        href = DAV_PREFIX + '/' + '/'.join(quote(p, safe='') for p in parts)
+        return href + '/' if collection and not href.endswith('/') else href
+
+    # ---------------------------------------------------------------------
+    # Methods
+    # ---------------------------------------------------------------------
+
+    def _dav_options(self, parts):
+        return Response(status=200, headers=[
+            ('DAV', '1'),
+            ('Allow', ', '.join(DAV_METHODS)),
+            ('MS-Author-Via', 'DAV'),
+        ])
+
+    def _dav_propfind(self, parts):
+        depth = request.httprequest.headers.get('Depth', 'infinity')
+        folder, doc = self._resolve(parts)
+        if folder is False and not doc:
+            return Response(status=404)
+
+        Folder = request.env['custom.document.folder']
+        Document = request.env['custom.document']
+        responses = []
+        if doc:
+            rows = Document._search_file_metadata([('id', '=', doc.id)])
+            responses += [self._document_response(parts[:-1], row) for row in rows]
+            return self._multistatus(responses)
+
+        # One query for the folders in scope, one for their documents
+        if depth == '0':
+            folder_domain = [('id', '=', folder.id)] if folder else None
+        elif depth == '1':
+            folder_domain = (['|', ('id', '=', folder.id), ('parent_id', '=', folder.id)]
+                             if folder else [('parent_id', '=', False)])
+        else:
+            folder_domain = [('parent_path', '=like', folder.parent_path + '%')] if folder else []
+        folders = Folder.search_read(folder_domain, ['name', 'parent_path', 'create_date', 'write_date']) \
+            if folder_domain is not None else []
+
+        if folder is None:
+            responses.append(self._collection_response([], None))
+        # hrefs follow the parent chain: names may contain the display separator
+        names = {rec['id']: rec['name'] for rec in folders}
+        chains = {rec['id']: [int(i) for i in rec['parent_path'].split('/') if i] for rec in folders}
+        ancestor_ids = {i for chain in chains.values() for i in chain} - set(names)
+        if ancestor_ids:
+            # the path to a readable folder may cross folders the user can't read
+            names.update((f.id, f.name) for f in Folder.sudo().browse(ancestor_ids))
+        folder_parts = {}
+        for rec in folders:
+            folder_parts[rec['id']] = [names[i] for i in chains[rec['id']]]
+            responses.append(self._collection_response(folder_parts[rec['id']], rec))
+
+        if depth == '1':
+            doc_folder_ids = [folder.id] if folder else []
+        elif depth == '0':
+            doc_folder_ids = []
+        else:
+            doc_folder_ids = list(folder_parts)
+        doc_domains = []
+        if doc_folder_ids:
+            doc_domains.append([('folder_id', 'in', doc_folder_ids)])
+        if folder is None and depth != '0':
+            # documents outside any folder live at the root
+            doc_domains.append([('folder_id', '=', False)])
+            folder_parts[False] = []
+        if doc_domains:
+            rows = Document._search_file_metadata(expression.AND([
+                expression.OR(doc_domains), [('document_type', '=', 'file')],
+            ]))
+            for row in rows:
+                responses.append(self._document_response(folder_parts[row['folder_id'] or False], row))
+        return self._multistatus(responses)
+
+    def _dav_get(self, parts):
+        folder, doc = self._resolve(parts)
+        if not doc:
+            return Response(status=405 if folder is not False else 404)
+        row = doc._search_file_metadata([('id', '=', doc.id)])[0]
+        headers = self._document_headers(row)
+        if request.httprequest.method == 'HEAD':
+            return Response(status=200, headers=headers)
+        doc._touch_access('download')
+        fileobj = doc._open_content()
+        return Response(wrap_file(request.httprequest.environ, fileobj), headers=headers, direct_passthrough=True)
+
+    _dav_head = _dav_get
+
+    def _dav_put(self, parts):
+        if not parts:
+            return Response(status=405)
+        folder, doc = self._resolve(parts)
+        if folder:
+            return Response(status=405)
+        name = parts[-1]
+        # the mimetype is sniffed while the body is stored
+        stream = request.httprequest.stream
+        if doc:
+            doc._set_content_from_stream(stream, file_name=name)
+            return Response(status=204)
+        parent = self._find_folder(parts[:-1])
+        if not parent:
+            return Response(status=409)
+        request.env['custom.document']._create_from_stream({
+            'name': name,
+            'file_name': name,
+            'folder_id': parent.id,
+        }, stream)
+        return Response(status=201)
+
+    def _dav_mkcol(self, parts):
+        if not parts:
+            return Response(status=405)
+        folder, doc = self._resolve(parts)
+        if folder or doc:
+            return Response(status=405)
+        parent = self._find_folder(parts[:-1])
+        if parts[:-1] and not parent:
+            return Response(status=409)
+        request.env['custom.document.folder'].create({
+            'name': parts[-1],
+            'parent_id': parent.id if parent else False,
+            'company_id': parent.company_id.id if parent else request.env.company.id,
+        })
+        return Response(status=201)
+
+    def _dav_delete(self, parts):
+        folder, doc = self._resolve(parts)
+        if doc:
+            doc.write({'active': False})
+            return Response(status=204)
+        if not folder:
+            return Response(status=404 if folder is False else 405)
+        # Clients delete the content first; refuse to drop a non-empty subtree.
+        # Counted past access rules and the trash: the unlink would cascade to
+        # documents the client never saw.
+        has_children = request.env['custom.document.folder'].sudo().with_context(active_test=False).search_count(
+            [('parent_id', '=', folder.id)])
+        has_documents = request.env['custom.document'].sudo().with_context(active_test=False).search_count(
+            [('folder_id', '=', folder.id)])
+        if has_children or has_documents:
+            return Response(status=409)
+        folder.unlink()
+        return Response(status=204)
+
+    def _dav_move(self, parts):
+        folder, doc = self._resolve(parts)
+        if not folder and not doc:
+            return Response(status=404 if folder is False else 405)
+        destination = urlparse(request.httprequest.headers.get('Destination', '')).path
+        if not destination.startswith(DAV_PREFIX + '/'):
+            return Response(status=400)
+        target = [unquote(p) for p in destination[len(DAV_PREFIX):].split('/') if p]
+        if not target:
+            return Response(status=403)
+        if any(self._resolve(target)):
+            return Response(status=412)
+        parent = self._find_folder(target[:-1])
+        if target[:-1] and not parent:
+            return Response(status=409)
+        if doc:
+            doc.write({'folder_id': parent.id if parent else False, 'name': target[-1], 'file_name': target[-1]})
+        else:
+            folder.write({'parent_id': parent.id if parent else False, 'name': target[-1]})
+        return Response(status=201)
+
+    # ---------------------------------------------------------------------
+    # XML
+    # ---------------------------------------------------------------------
+
+    def _document_headers(self, row):
+        headers = [
+            ('Content-Type', row['mimetype'] or 'application/octet-stream'),
+            ('Content-Length', str(row['size'])),
+            ('Last-Modified', http_date(row['write_date'])),
+        ]
+        if row['checksum']:
+            headers.append(('ETag', '"%s"' % row['checksum']))
+        return headers
+
+    def _collection_response(self, parts, rec):
+        props = {
+            'displayname': parts[-1] if parts else 'Documents',
+            'resourcetype': etree.Element(_dav('collection')),
+        }
+        if rec:
+            props['creationdate'] = rec['create_date'].strftime('%Y-%m-%dT%H:%M:%SZ')
+            props['getlastmodified'] = http_date(rec['write_date'])
+        return self._response_element(self._href(parts, collection=True), props)
+
+    def _document_response(self, folder_parts, row):
+        name = row['file_name'] or row['name']
+        props = {
+            'displayname': name,
+            'resourcetype': None,
+            'getcontentlength': str(row['size']),
+            'getcontenttype': row['mimetype'] or 'application/octet-stream',
+            'creationdate': row['create_date'].strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'getlastmodified': http_date(row['write_date']),
+        }
+        if row['checksum']:
+            props['getetag'] = '"%s"' % row['checksum']
+        return self._response_element(self._href(folder_parts + [name]), props)
+
+    def _response_element(self, href, props):
+        response = etree.Element(_dav('response'))
+        etree.SubElement(response, _dav('href')).text = href
+        propstat = etree.SubElement(response, _dav('propstat'))
+        prop = etree.SubElement(propstat, _dav('prop'))
+        for name, value in props.items():
+            node = etree.SubElement(prop, _dav(name))
+            if isinstance(value, etree._Element):
+                node.append(value)
+            elif value is not None:
+                node.text = value
+        etree.SubElement(propstat, _dav('status')).text = 'HTTP/1.1 200 OK'
+        return response
+
+    def _multistatus(self, responses):
+        root = etree.Element(_dav('multistatus'), nsmap={'D': DAV_NS})
+        root.extend(responses)
+        body = etree.tostring(root, xml_declaration=True, encoding='utf-8')
+        return Response(body, status=207, headers=[('Content-Type', 'application/xml; charset=utf-8')])
@@ -4,19 +4,30 @@
 from . import document_tag
 from . import document_folder
 from . import document
+from . import document_storage
+from . import document_pdf
+from . import document_signed_url
+from . import document_image
+from . import document_retention
+from . import document_access_log
+from . import document_change
+from . import document_perf
 from . import document_reference_wizard
 from . import share_line
 from . import folder_share
 from . import hr_employee
+from . import res_config_settings
 
 # 2. All wizards (TransientModels)
 from . import document_upload_wizard
 from . import folder_wizard
 from . import folder_upload_wizard
+from . import directory_import_wizard
 from . import folder_rename_wizard
 from . import preview_wizard
 from . import actions_wizard     
 from . import rename_wizard          
 from . import properties_wizard  
+from . import pdf_split_wizard
 from . import share_wizard
 from . import folder_share_wizard
\ No newline at end of file
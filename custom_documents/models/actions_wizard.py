@@ -1,3 +1,4 @@
+import base64
 from odoo import models, fields, _, api
 from odoo.exceptions import UserError
 
@@ -20,7 +21,7 @@ class CustomDocumentPreviewActionsWizard(models.TransientModel):
         vals = {
             'name': (self.document_id.name or '') + ' (copy)',
             'document_type': self.document_id.document_type,
-            'file': self.document_id.with_context(bin_size=False).file,
+            'file': base64.b64encode(self.document_id._get_file_content()) if self.document_id.document_type == 'file' else False,
             'file_name': self.document_id.file_name,
             'mimetype': self.document_id.mimetype,
             'url': self.document_id.url,
@@ -119,7 +120,8 @@ class CustomDocumentPreviewActionsWizard(models.TransientModel):
         }
 
     def action_split_pdf(self):
-        raise UserError(_("Split PDF: not implemented yet."))
+        self._ensure_doc()
+        return self.document_id.action_split_pdf()
 
     def action_sign(self):
         raise UserError(_("Sign: please integrate with the Sign app if installed."))
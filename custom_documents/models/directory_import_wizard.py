@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+CHECKSUM_QUERY_BATCH = 1000
+
+
+def hash_file(path):
+    """Return (path, (sha1, sha256, size)), the digests the filestore needs."""
+    sha1, sha256, size = hashlib.sha1(), hashlib.sha256(), 0
+    with open(path, 'rb') as fileobj:
+        while chunk := fileobj.read(HASH_CHUNK_SIZE):
+            sha1.update(chunk)
+            sha256.update(chunk)
+            size += len(chunk)
+    return path, (sha1.hexdigest(), sha256.hexdigest(), size)
+
+
+class DirectoryImportWizard(models.TransientModel):
+    _name = 'custom.document.directory.import.wizard'
+    _description = 'Import Server Directory'
+
+    source_path = fields.Char('Server Directory', required=True,
+                              help='Absolute path of a directory readable by the server')
+    parent_folder_id = fields.Many2one('custom.document.folder', string='Import Into', required=True)
+    skip_existing = fields.Boolean('Skip Known Files', default=True,
+                                   help='Skip files whose content is already stored in Documents')
+    workers = fields.Integer('Hashing Threads', default=lambda self: min(os.cpu_count() or 1, 8))
+
+    # Results
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft')
+    folders_created = fields.Integer('Folders Created', readonly=True)
+    files_imported = fields.Integer('Files Imported', readonly=True)
+    files_skipped = fields.Integer('Files Skipped', readonly=True)
+    mb_imported = fields.Float('Imported (MB)', readonly=True, digits=(16, 1))
+    duration = fields.Float('Duration (s)', readonly=True, digits=(16, 1))
+    throughput = fields.Char('Throughput', readonly=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'custom.document.folder':
+            res.setdefault('parent_folder_id', self.env.context.get('active_id'))
+        return res
+
+    def _check_source_path(self):
+        """Resolve the directory, confined to the configured import root if any."""
+        self.ensure_one()
+        if not self.env.user.has_group('base.group_system'):
+            raise UserError(_('Only administrators can import server directories.'))
+        path = os.path.realpath(self.source_path or '')
+        if not os.path.isdir(path):
+            raise UserError(_('Directory not found on the server: %s') % self.source_path)
+        root = self.env['ir.config_parameter'].sudo().get_param('custom_documents.import_root')
+        if root and os.path.commonpath([path, os.path.realpath(root)]) != os.path.realpath(root):
+            raise UserError(_('Imports are restricted to %s.') % root)
+        return path
+
+    @api.model
+    def _walk(self, root):
+        """Yield (relative folder, file name, absolute path), skipping hidden entries."""
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d != '__MACOSX')
+            rel_dir = os.path.relpath(dirpath, root)
+            for name in sorted(filenames):
+                if name.startswith('.') or name in ('Thumbs.db', 'desktop.ini'):
+                    continue
+                yield ('' if rel_dir == '.' else rel_dir), name, os.path.join(dirpath, name)
+
+    def _hash_files(self, paths):
+        """Hash the files in parallel; return {path: (sha1, sha256, size)}.
+
+        hashlib and file reads release the GIL, so threads keep the disks and
+        cores busy without forking the server.
+        """
+        workers = max(self.workers, 1)
+        if workers == 1 or len(paths) < 2:
+            return dict(map(hash_file, paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(pool.map(hash_file, paths))
+
+    @api.model
+    def _get_known_checksums(self, checksums):
+        known = set()
+        checksums = list(checksums)
+        for start in range(0, len(checksums), CHECKSUM_QUERY_BATCH):
+            self.env.cr.execute("""
+                SELECT DISTINCT checksum
+                  FROM ir_attachment
+                 WHERE res_model = 'custom.document' AND res_field = 'file'
+                   AND checksum IN %s
+            """, (tuple(checksums[start:start + CHECKSUM_QUERY_BATCH]),))
+            known.update(row[0] for row in self.env.cr.fetchall())
+        return known
+
+    def action_import(self):
+        self.ensure_one()
+        root = self._check_source_path()
+        started = time.monotonic()
+        Folder = self.env['custom.document.folder']
+        Document = self.env['custom.document']
+
+        entries = list(self._walk(root))
+        hashes = self._hash_files([path for _rel, _name, path in entries])
+        known = self._get_known_checksums({digests[0] for digests in hashes.values()}) if self.skip_existing else set()
+
+        company = self.parent_folder_id.company_id or self.env.company
+        folders = {'': self.parent_folder_id}
+        folders_created = files_imported = files_skipped = bytes_imported = 0
+        for rel_dir, name, path in entries:
+            sha1, _sha256, size = digests = hashes[path]
+            if sha1 in known:
+                files_skipped += 1
+                continue
+            if self.skip_existing:
+                # also skips duplicates within the imported tree
+                known.add(sha1)
+            folder = folders.get(rel_dir)
+            if folder is None:
+                parts = rel_dir.split(os.sep)
+                folder = Folder._resolve_path(parts, company=company, parent=self.parent_folder_id, create=False)
+                if not folder:
+                    folder, created = Folder._create_path(parts, company, self.parent_folder_id)
+                    folders_created += len(created)
+                folders[rel_dir] = folder
+            with open(path, 'rb') as fileobj:
+                Document._create_from_stream({
+                    'name': os.path.splitext(name)[0],
+                    'file_name': name,
+                    'folder_id': folder.id,
+                }, fileobj, digests=digests)
+            files_imported += 1
+            bytes_imported += size
+
+        duration = time.monotonic() - started
+        rate = bytes_imported / duration / (1024 * 1024) if duration else 0.0
+        throughput = _('%(mb).1f MB/s, %(files).1f files/s') % {
+            'mb': rate,
+            'files': files_imported / duration if duration else 0.0,
+        }
+        _logger.info("Directory import of %s: %s files imported, %s skipped, %s folders created in %.1fs (%s)",
+                     root, files_imported, files_skipped, folders_created, duration, throughput)
+        self.write({
+            'state': 'done',
+            'folders_created': folders_created,
+            'files_imported': files_imported,
+            'files_skipped': files_skipped,
+            'mb_imported': bytes_imported / (1024 * 1024),
+            'duration': duration,
+            'throughput': throughput,
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
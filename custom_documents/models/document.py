@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import base64
-import mimetypes
 import re
 from datetime import timedelta
 
@@ -8,6 +7,18 @@ from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError, AccessError
 from odoo.osv import expression
 
+from .document_perf import instrument
+
+TRASH_RETENTION_DAYS = 30
+TRASH_PURGE_BATCH_SIZE = 200
+
+# Models whose binary attachments may be left behind by DB-level cascades
+# (folder deletion, transient wizard vacuum) without going through unlink().
+ATTACHMENT_GC_MODELS = (
+    'custom.document',
+    'custom.document.preview.wizard',
+    'custom.document.folder.upload.file',
+)
 
 
 class CustomDocument(models.Model):
@@ -65,6 +76,7 @@ class CustomDocument(models.Model):
 
     # Other
     active = fields.Boolean('Active', default=True)
+    trashed_date = fields.Datetime('Moved to Trash On', readonly=True, copy=False, index=True)
     color = fields.Integer('Color')
     priority = fields.Selection(
         [('0', 'Normal'), ('1', 'High')],
@@ -204,7 +216,8 @@ class CustomDocument(models.Model):
     @api.constrains('document_type', 'file', 'url')
     def _check_document_data(self):
         for rec in self:
-            if rec.document_type == 'file' and not rec.file:
+            if (rec.document_type == 'file' and not rec.with_context(bin_size=True).file and rec.storage_tier != 'cold'
+                    and not self.env.context.get('document_streamed_upload')):
                 raise ValidationError(_('Please upload a file.'))
             if rec.document_type == 'url' and not rec.url:
                 raise ValidationError(_('Please provide a URL.'))
@@ -341,9 +354,9 @@ class CustomDocument(models.Model):
             
         # DOMAIN FOR "RECENT"
         if value == 'recent':
-            # This domain comes from your 'recent' filter in document_views.xml
-            domain_date = (fields.Date.context_today(self) - timedelta(days=7)).strftime('%Y-%m-%d')
-            return [('write_date', '>=', domain_date), ('active', '=', True)]
+            # What *I* opened, previewed or downloaded lately (per-user access log)
+            recent_ids = self.env['custom.document.access.log']._get_recent_document_ids()
+            return [('id', 'in', recent_ids), ('active', '=', True)]
             
         # DOMAIN FOR "TRASH"
         if value == 'trash':
@@ -360,17 +373,21 @@ class CustomDocument(models.Model):
         """Override search to filter documents user has access to"""
         # Add access domain if not superuser
         if not self.env.su:
-            user = self.env.user
-            access_domain = [
-                '|', '|',
-                    ('user_id', '=', user.id),
-                    ('share_line_ids.user_id', '=', user.id),
-                    ('share_access', '=', 'internal')
-            ]
-            args = expression.AND([args, access_domain])
+            args = expression.AND([args, self._get_search_access_domain()])
         
         return super().search(args, offset=offset, limit=limit, order=order, count=count)
 
+    @api.model
+    def _get_search_access_domain(self):
+        """Documents the current user may see: owned, shared with them, or internal."""
+        user = self.env.user
+        return [
+            '|', '|',
+                ('user_id', '=', user.id),
+                ('share_line_ids.user_id', '=', user.id),
+                ('share_access', '=', 'internal')
+        ]
+
     def check_access_rights(self, operation, raise_exception=True):
         """Allow read access for shared documents"""
         res = super().check_access_rights(operation, raise_exception)
@@ -413,14 +430,6 @@ class CustomDocument(models.Model):
                 vals['name'] = vals['url'].split('/')[-1] or _('URL Document')
             elif vals.get('file_name') and not vals.get('name'):
                 vals['name'] = vals['file_name']
-
-            # Guess mimetype for uploaded files
-            if vals.get('file') and not vals.get('mimetype'):
-                fname = vals.get('file_name')
-                if fname:
-                    mt, _enc = mimetypes.guess_type(fname)
-                    if mt:
-                        vals['mimetype'] = mt
         return super().create(vals_list)
     
     def _is_editor(self):
@@ -442,31 +451,152 @@ class CustomDocument(models.Model):
 
         return False
 
+    def _get_shared_editor_ids(self):
+        """Return the ids of self explicitly shared with the current user (one query)."""
+        lines = self.env['custom.document.share.line'].sudo().search_read(
+            [('document_id', 'in', self.ids), ('user_id', '=', self.env.uid)],
+            ['document_id'],
+        )
+        return {line['document_id'][0] for line in lines}
+
+    def _check_editor_bulk(self):
+        """Set-based counterpart of _is_editor(): one permission check for the
+        whole selection, using a prefetched share map."""
+        if not self or self.env.user.has_group('base.group_system'):
+            return True
+        uid = self.env.uid
+        not_owned = self.sudo().filtered(lambda d: d.user_id.id != uid)
+        denied = not_owned.browse(set(not_owned.ids) - not_owned._get_shared_editor_ids())
+        if denied:
+            names = ', '.join(denied[:5].mapped('name'))
+            if len(denied) > 5:
+                names += ', ...'
+            raise UserError(_('You do not have permission to edit: %s') % names)
+        return True
+
     def write(self, vals):
         """Override write to check permissions"""
-        for rec in self:
-            # Allow harmless flags from viewers (stars, following)
-            harmless = {'is_starred', 'message_follower_ids'}
-            if set(vals) - harmless and not rec._is_editor():
-                raise UserError(_('You do not have permission to edit this document.'))
-        
-        if vals.get('file') and not vals.get('mimetype'):
-            file_name = vals.get('file_name') or self.file_name
-            if file_name:
-                mt, _enc = mimetypes.guess_type(file_name)
-                if mt:
-                    vals['mimetype'] = mt
+        # Allow harmless flags from viewers (stars, following)
+        harmless = {'is_starred', 'message_follower_ids'}
+        if set(vals) - harmless:
+            self._check_editor_bulk()
+
+        if 'active' in vals:
+            vals['trashed_date'] = False if vals['active'] else fields.Datetime.now()
         return super().write(vals)
 
+    # -------------------------------------------------------------------------
+    # Trash retention
+    # -------------------------------------------------------------------------
+    @api.model
+    def _get_trash_retention_days(self):
+        param = self.env['ir.config_parameter'].sudo().get_param(
+            'custom_documents.trash_retention_days', TRASH_RETENTION_DAYS)
+        try:
+            return int(param)
+        except (TypeError, ValueError):
+            return TRASH_RETENTION_DAYS
+
+    @api.model
+    def _cron_purge_trash(self, batch_size=TRASH_PURGE_BATCH_SIZE, auto_commit=True):
+        """Hard-delete trashed documents past the retention period, in chunks."""
+        days = self._get_trash_retention_days()
+        if days > 0:
+            cutoff = fields.Datetime.now() - timedelta(days=days)
+            Doc = self.sudo().with_context(active_test=False)
+            domain = [
+                ('active', '=', False),
+                '|', ('trashed_date', '<', cutoff),
+                     '&', ('trashed_date', '=', False), ('write_date', '<', cutoff),
+            ]
+            while True:
+                docs = Doc.search(domain, limit=batch_size, order='id')
+                if not docs:
+                    break
+                docs.unlink()
+                if auto_commit:
+                    self.env.cr.commit()
+        self._gc_orphan_attachments(batch_size=batch_size, auto_commit=auto_commit)
+
+    @api.model
+    def _gc_orphan_attachments(self, batch_size=TRASH_PURGE_BATCH_SIZE, auto_commit=True):
+        """Remove attachments whose owning record no longer exists.
+
+        Unlinking through the ORM marks the filestore files for deletion; they
+        are then removed by the attachment file-store garbage collector.
+        """
+        Attachment = self.env['ir.attachment'].sudo()
+        for model_name in ATTACHMENT_GC_MODELS:
+            if model_name not in self.env:
+                continue
+            table = self.env[model_name]._table
+            while True:
+                self.env.cr.execute(f"""
+                    SELECT a.id
+                      FROM ir_attachment a
+                     WHERE a.res_model = %s
+                       AND NOT EXISTS (SELECT 1 FROM "{table}" t WHERE t.id = a.res_id)
+                     LIMIT %s
+                """, (model_name, batch_size))
+                ids = [row[0] for row in self.env.cr.fetchall()]
+                if not ids:
+                    break
+                Attachment.browse(ids).unlink()
+                if auto_commit:
+                    self.env.cr.commit()
+        Attachment._gc_file_store()
+
+    # -------------------------------------------------------------------------
+    # ZIP export
+    # -------------------------------------------------------------------------
+    def _get_zip_entries(self, folder=None):
+        """Return [(arcname, content source)] for self, or for every file in
+        the subtree of ``folder``. Archive paths mirror the folder hierarchy."""
+        if folder:
+            docs = self.search([('folder_id', 'child_of', folder.id), ('document_type', '=', 'file')])
+            # keep the exported folder itself as the top-level directory
+            skip = len([i for i in folder.parent_path.split('/') if i]) - 1
+        else:
+            docs = self.search([('id', 'in', self.ids), ('document_type', '=', 'file')])
+            skip = 0
+        path_names = docs.mapped('folder_id')._get_path_names()
+        # one attachment query for the whole export
+        attachments = docs.filtered(lambda d: d.storage_tier != 'cold')._get_file_attachments()
+
+        def clean(name):
+            return (name or '_').replace('/', '_').replace('\\', '_')
+
+        entries, used = [], set()
+        for doc in docs:
+            parts = [clean(n) for n in path_names.get(doc.folder_id.id, [])[skip:]]
+            arcname = '/'.join(parts + [clean(doc.file_name or doc.name)])
+            stem, dot, ext = arcname.rpartition('.')
+            if not dot:
+                stem, ext = arcname, ''
+            counter = 1
+            while arcname in used:
+                counter += 1
+                arcname = f"{stem} ({counter}){dot}{ext}"
+            try:
+                source = doc._get_content_source(attachments)
+            except UserError:
+                continue
+            used.add(arcname)
+            entries.append((arcname, source))
+        docs._touch_access('download')
+        return entries
+
     # -------------------------------------------------------------------------
     # Actions
     # -------------------------------------------------------------------------
     def action_download(self):
         self.ensure_one()
         if self.document_type == 'file':
+            self._touch_access('download')
             return {
                 'type': 'ir.actions.act_url',
-                'url': f"/web/content/{self._name}/{self.id}/file/{self.file_name or ''}?download=true",
+                # signed URLs are served from the filestore and cacheable
+                'url': self._get_signed_url('download') or self._get_content_url(download=True),
                 'target': 'self',
             }
         if self.document_type == 'url':
@@ -517,10 +647,11 @@ class CustomDocument(models.Model):
             'datas': self.file,
         })
 
+    @instrument('document.view_file', payload=lambda doc, result: doc.file_size)
     def action_view_file(self):
         """Open PDF in a modal via a transient wizard, else download."""
         self.ensure_one()
-        if self.document_type != 'file' or not self.file:
+        if self.document_type != 'file' or not self._has_content():
             return False
 
         # Detect PDF quickly
@@ -531,17 +662,18 @@ class CustomDocument(models.Model):
             is_pdf_like = True
         else:
             try:
-                blob = self.with_context(bin_size=False).file
-                is_pdf_like = (base64.b64decode(blob)[:5] == b'%PDF-')
+                with self._open_content() as fileobj:
+                    is_pdf_like = (fileobj.read(5) == b'%PDF-')
             except Exception:
                 is_pdf_like = False
 
         if not is_pdf_like:
             return self.action_download()
 
+        self._touch_access('preview')
         wiz = self.env['custom.document.preview.wizard'].sudo().create({
             'document_id': self.id,
-            'data': self.with_context(bin_size=False).file,
+            'data': base64.b64encode(self._get_file_content()),
             'data_fname': self.file_name or (self.name + '.pdf'),
             'mimetype': self.mimetype or 'application/pdf',
         })
@@ -556,6 +688,48 @@ class CustomDocument(models.Model):
         }
 
     # ---------- List-view action helpers ----------
+    @api.model
+    def get_hover_metadata(self, ids):
+        """Everything the list hover actions need for a page of rows, in one call.
+
+        Sizes come from the attachment metadata and edit rights from one
+        share-line query, so the client can act on hover without calling back.
+        """
+        rows = self._search_file_metadata([('id', 'in', list(ids))])
+        docs = self.browse([row['id'] for row in rows])
+        extra = {rec['id']: rec for rec in docs.read(['url', 'user_id', 'tag_ids', 'is_locked', 'locked_by'])}
+        tag_names = dict(self.env['custom.document.tag'].browse(
+            {tag_id for rec in extra.values() for tag_id in rec['tag_ids']}
+        ).mapped(lambda t: (t.id, t.display_name)))
+        is_admin = self.env.user.has_group('base.group_system')
+        shared = docs._get_shared_editor_ids()
+        uid = self.env.uid
+
+        result = {}
+        for row in rows:
+            rec = extra[row['id']]
+            can_edit = is_admin or (rec['user_id'] and rec['user_id'][0] == uid) or row['id'] in shared
+            if row['document_type'] == 'url':
+                download_url = rec['url'] or False
+            else:
+                download_url = f"/documents/content/{row['id']}?download=true" if row['size'] else False
+            result[row['id']] = {
+                'name': row['name'],
+                'document_type': row['document_type'],
+                'file_name': row['file_name'],
+                'mimetype': row['mimetype'],
+                'file_size': row['size'],
+                'folder_id': row['folder_id'],
+                'owner': rec['user_id'],
+                'tags': [[tag_id, tag_names.get(tag_id, '')] for tag_id in rec['tag_ids']],
+                'is_locked': rec['is_locked'],
+                'locked_by': rec['locked_by'],
+                'download_url': download_url,
+                'can_edit': bool(can_edit),
+                'can_share': bool(can_edit),
+            }
+        return result
+
     def _ensure_single(self, label=_("this action")):
         if len(self) != 1:
             raise UserError(_("Please select exactly one document for %s.") % label)
@@ -585,6 +759,12 @@ class CustomDocument(models.Model):
         return super().copy(default)
 
     def action_menu_download(self):
+        if len(self) > 1:
+            return {
+                'type': 'ir.actions.act_url',
+                'url': '/documents/zip?ids=%s' % ','.join(str(i) for i in self.ids),
+                'target': 'self',
+            }
         self._ensure_single(_("download"))
         return self.action_download()
 
@@ -593,33 +773,75 @@ class CustomDocument(models.Model):
         return self.action_share_document()
 
     def action_menu_move_to_trash(self):
-        self.sudo().write({'active': False})
+        self.action_bulk_trash()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
+
+    def action_menu_restore(self):
+        self.action_bulk_restore()
         return {'type': 'ir.actions.client', 'tag': 'reload'}
 
     def action_menu_lock_toggle(self):
-        for d in self:
-            d.sudo().action_lock()
+        to_lock = self.filtered(lambda d: not d.is_locked)
+        to_lock.action_bulk_lock(True)
+        (self - to_lock).action_bulk_lock(False)
         return {'type': 'ir.actions.client', 'tag': 'reload'}
 
     def action_menu_create_shortcut(self):
-        new_ids = []
-        for d in self:
-            url = f"/web/content/custom.document/{d.id}/file/{d.file_name or 'file'}"
-            new_ids.append(self.env['custom.document'].sudo().create({
-                'name': f"Shortcut to {d.name}",
-                'document_type': 'url',
-                'url': url,
-                'folder_id': d.folder_id.id,
-                'tag_ids': [(6, 0, d.tag_ids.ids)],
-            }).id)
+        shortcuts = self.action_bulk_create_shortcut()
         return {
             'type': 'ir.actions.act_window',
             'res_model': 'custom.document',
             'view_mode': 'list,form',
-            'domain': [('id', 'in', new_ids)],
+            'domain': [('id', 'in', shortcuts.ids)],
             'target': 'current',
         }
 
+    # ---------- Bulk operations (one permission check, one write) ----------
+    def action_bulk_move(self, folder_id):
+        self.write({'folder_id': folder_id or False})
+        return True
+
+    def action_bulk_tag(self, tag_ids, mode='add'):
+        """Add, remove or replace tags on the whole selection."""
+        if mode == 'replace':
+            commands = [(6, 0, tag_ids)]
+        elif mode == 'remove':
+            commands = [(3, tag_id) for tag_id in tag_ids]
+        else:
+            commands = [(4, tag_id) for tag_id in tag_ids]
+        self.write({'tag_ids': commands})
+        return True
+
+    def action_bulk_lock(self, lock=True):
+        if not self:
+            return True
+        if not lock:
+            foreign = self.filtered(lambda d: d.is_locked and d.locked_by and d.locked_by != self.env.user)
+            if foreign:
+                raise UserError(_('This document is locked by %s') % foreign[0].locked_by.name)
+        self.sudo().write({
+            'is_locked': lock,
+            'locked_by': self.env.user.id if lock else False,
+        })
+        return True
+
+    def action_bulk_trash(self):
+        self.sudo().write({'active': False})
+        return True
+
+    def action_bulk_restore(self):
+        self.with_context(active_test=False).sudo().write({'active': True})
+        return True
+
+    def action_bulk_create_shortcut(self):
+        return self.env['custom.document'].sudo().create([{
+            'name': f"Shortcut to {d.name}",
+            'document_type': 'url',
+            'url': f"/web/content/custom.document/{d.id}/file/{d.file_name or 'file'}",
+            'folder_id': d.folder_id.id,
+            'tag_ids': [(6, 0, d.tag_ids.ids)],
+        } for d in self])
+
     def action_menu_manage_versions(self):
         self._ensure_single(_("manage versions"))
         return {
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+from odoo.tools.sql import create_index
+
+# Only the most recent entries per user are kept; "Recent" never needs more.
+ACCESS_LOG_MAX_PER_USER = 200
+RECENT_DAYS = 7
+# Opens repeat on every reload; one "open" per window is enough
+OPEN_DEBOUNCE_MINUTES = 30
+
+
+class CustomDocumentAccessLog(models.Model):
+    """Append-only log of the documents each user opened, previewed or downloaded."""
+    _name = 'custom.document.access.log'
+    _description = 'Document Access Log'
+    _order = 'accessed_at desc, id desc'
+    _log_access = False
+
+    user_id = fields.Many2one('res.users', string='User', required=True, ondelete='cascade')
+    document_id = fields.Many2one('custom.document', string='Document', required=True, ondelete='cascade')
+    accessed_at = fields.Datetime('Accessed At', required=True, default=fields.Datetime.now)
+    access_type = fields.Selection([
+        ('open', 'Opened'),
+        ('preview', 'Previewed'),
+        ('download', 'Downloaded'),
+    ], string='Access', required=True, default='open')
+
+    def init(self):
+        create_index(self.env.cr, 'custom_document_access_log_user_accessed_idx',
+                     self._table, ['user_id', 'accessed_at DESC'])
+
+    @api.model
+    def _record(self, documents, access_type):
+        """Append one row per document for the current user (single INSERT).
+
+        Opens are debounced: a document already opened, previewed or
+        downloaded by the user within OPEN_DEBOUNCE_MINUTES is not logged again.
+        """
+        if not documents or self.env.user._is_public():
+            return
+        if access_type != 'open':
+            self.env.cr.execute("""
+                INSERT INTO custom_document_access_log (user_id, document_id, accessed_at, access_type)
+                SELECT %s, unnest(%s), (now() at time zone 'UTC'), %s
+            """, (self.env.uid, list(documents.ids), access_type))
+            return
+        self.env.cr.execute("""
+            INSERT INTO custom_document_access_log (user_id, document_id, accessed_at, access_type)
+            SELECT %(uid)s, doc.id, (now() at time zone 'UTC'), 'open'
+              FROM unnest(%(ids)s) AS doc(id)
+             WHERE NOT EXISTS (
+                    SELECT 1
+                      FROM custom_document_access_log log
+                     WHERE log.user_id = %(uid)s AND log.document_id = doc.id
+                       AND log.accessed_at >= (now() at time zone 'UTC') - make_interval(mins => %(minutes)s)
+             )
+        """, {'uid': self.env.uid, 'ids': list(documents.ids), 'minutes': OPEN_DEBOUNCE_MINUTES})
+
+    @api.model
+    def _get_recent_document_ids(self, days=RECENT_DAYS):
+        """Documents the current user touched lately, newest first (index range scan).
+
+        Grouped before the limit, so one document opened many times does not
+        push the others out.
+        """
+        self.env.cr.execute("""
+            SELECT document_id
+              FROM custom_document_access_log
+             WHERE user_id = %s
+               AND accessed_at >= (now() at time zone 'UTC') - make_interval(days => %s)
+          GROUP BY document_id
+          ORDER BY MAX(accessed_at) DESC
+             LIMIT %s
+        """, (self.env.uid, days, ACCESS_LOG_MAX_PER_USER))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.autovacuum
+    def _gc_access_log(self):
+        """Cap the history of every user to the latest entries."""
+        self.env.cr.execute("""
+            DELETE FROM custom_document_access_log log
+             USING (
+                SELECT id
+                  FROM (SELECT id, row_number() OVER (PARTITION BY user_id
+                                                      ORDER BY accessed_at DESC, id DESC) AS rank
+                          FROM custom_document_access_log) ranked
+                 WHERE ranked.rank > %s
+             ) old
+             WHERE log.id = old.id
+        """, (ACCESS_LOG_MAX_PER_USER,))
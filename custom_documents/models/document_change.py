@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+from .document_folder import SUBTREE_FIELDS
+
+CHANGE_FEED_LIMIT = 500
+CHANGE_FEED_MAX_LIMIT = 2000
+CHANGE_JOURNAL_RETENTION_DAYS = 90
+CHANGE_JOURNAL_HORIZON_PARAM = 'custom_documents.change_journal_horizon'
+# Storage bookkeeping that does not change what a sync client sees
+JOURNAL_IGNORED_FIELDS = {
+    'storage_tier', 'archive_path', 'archive_compressed', 'archive_size',
+    'last_access_date', 'trashed_date', 'image_derivatives_pending',
+}
+
+
+class CustomDocumentChange(models.Model):
+    """Append-only journal of document and folder changes.
+
+    The sync cursor is (txid, id): rows are read in that order and only up to
+    the oldest transaction still running. Ids are allocated before commit, so
+    a plain id cursor would step over rows of a transaction committing late;
+    every transaction below the snapshot xmin has finished, so rows behind
+    the cursor can no longer appear.
+    """
+    _name = 'custom.document.change'
+    _description = 'Document Change Journal'
+    _order = 'id'
+    _log_access = False
+
+    item_type = fields.Selection([
+        ('document', 'Document'),
+        ('folder', 'Folder'),
+    ], string='Item Type', required=True)
+    res_id = fields.Integer('Record ID', required=True)
+    change_type = fields.Selection([
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('moved', 'Moved'),
+        ('deleted', 'Deleted'),
+    ], string='Change', required=True)
+    folder_id = fields.Integer('Folder ID', help='Folder holding the item after the change')
+    owner_id = fields.Integer('Owner ID', help='Owner of the item when the change was recorded')
+    folder_path = fields.Char('Folder Path', help='parent_path of the folder holding the item after the change')
+    old_folder_path = fields.Char('Previous Folder Path', help='parent_path before a move')
+    changed_at = fields.Datetime('Changed At', required=True, default=fields.Datetime.now)
+
+    def init(self):
+        # Not an ORM field: filled by the database with the writing transaction
+        self.env.cr.execute("""
+            ALTER TABLE custom_document_change
+              ADD COLUMN IF NOT EXISTS txid bigint NOT NULL DEFAULT txid_current()
+        """)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS custom_document_change_txid_id_idx
+                ON custom_document_change (txid, id)
+        """)
+
+    @api.model
+    def _record(self, item_type, change_type, records, folder_paths, old_folder_paths=None):
+        """Append one row per record in a single INSERT.
+
+        ``records`` are (id, folder id, owner id) triples; the folder and owner
+        decide who may see a later 'deleted' row.
+        """
+        if not records:
+            return
+        res_ids, folder_ids, owner_ids = zip(*records)
+        old_folder_paths = old_folder_paths or [None] * len(res_ids)
+        self.env.cr.execute("""
+            INSERT INTO custom_document_change
+                   (item_type, change_type, res_id, folder_id, owner_id, folder_path, old_folder_path, changed_at)
+            SELECT %s, %s, unnest(%s::int[]), unnest(%s::int[]), unnest(%s::int[]),
+                   unnest(%s::varchar[]), unnest(%s::varchar[]), (now() at time zone 'UTC')
+        """, (item_type, change_type, list(res_ids), list(folder_ids), list(owner_ids),
+              list(folder_paths), list(old_folder_paths)))
+
+    @api.model
+    def _get_head_cursor(self):
+        """Cursor past every row of the transactions already finished."""
+        self.env.cr.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        return '%s.0' % self.env.cr.fetchone()[0]
+
+    @api.model
+    def _get_changes(self, cursor=None, folder=None, limit=CHANGE_FEED_LIMIT):
+        """Return the changes after ``cursor`` visible to the current user.
+
+        ``reset`` tells the client its cursor is unknown or too old and that
+        it must re-list the tree before resuming from the returned cursor.
+        Several changes of the same item within a page are collapsed.
+        """
+        limit = max(1, min(int(limit or CHANGE_FEED_LIMIT), CHANGE_FEED_MAX_LIMIT))
+        cr = self.env.cr
+        try:
+            txid, last_id = (int(part) for part in str(cursor or '').split('.'))
+        except ValueError:
+            return {'cursor': self._get_head_cursor(), 'reset': True, 'has_more': False, 'changes': []}
+        horizon = int(self.env['ir.config_parameter'].sudo().get_param(CHANGE_JOURNAL_HORIZON_PARAM, 0))
+        if txid <= horizon:
+            return {'cursor': self._get_head_cursor(), 'reset': True, 'has_more': False, 'changes': []}
+
+        query = """
+            SELECT txid, id, item_type, change_type, res_id, folder_id, owner_id
+              FROM custom_document_change
+             WHERE (txid, id) > (%(txid)s, %(id)s)
+               AND txid < txid_snapshot_xmin(txid_current_snapshot())
+        """
+        params = {'txid': txid, 'id': last_id, 'limit': limit + 1}
+        if folder:
+            query += " AND (folder_path LIKE %(scope)s OR old_folder_path LIKE %(scope)s)"
+            params['scope'] = folder.parent_path + '%'
+        cr.execute(query + " ORDER BY txid, id LIMIT %(limit)s", params)
+        rows = cr.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if has_more:
+            next_cursor = '%s.%s' % rows[-1][:2]
+        else:
+            next_cursor = self._get_head_cursor()
+
+        latest = {}
+        for _txid, _id, item_type, change_type, res_id, folder_id, owner_id in rows:
+            key = (item_type, res_id)
+            previous = latest.get(key)
+            if previous and previous[0] == 'created' and change_type != 'deleted':
+                continue
+            latest[key] = (change_type, folder_id, owner_id)
+        return {
+            'cursor': next_cursor,
+            'reset': False,
+            'has_more': has_more,
+            'changes': self._read_changed_items(latest),
+        }
+
+    @api.model
+    def _read_changed_items(self, latest):
+        """Attach current values to live items, dropping those the user can't read.
+
+        A deleted item is reported to its owner and to the users who can read
+        the folder that held it.
+        """
+        live = {'document': [], 'folder': []}
+        deleted_folder_ids = set()
+        for (item_type, res_id), (change_type, folder_id, _owner_id) in latest.items():
+            if change_type != 'deleted':
+                live[item_type].append(res_id)
+            elif folder_id:
+                deleted_folder_ids.add(folder_id)
+        values = {}
+        docs = self.env['custom.document'].with_context(active_test=False).search_read(
+            [('id', 'in', live['document'])],
+            ['name', 'folder_id', 'document_type', 'file_name', 'mimetype', 'file_size', 'url', 'active', 'write_date'],
+        ) if live['document'] else []
+        values.update({('document', d['id']): d for d in docs})
+        folders = self.env['custom.document.folder'].search_read(
+            [('id', 'in', live['folder'])], ['name', 'parent_id', 'write_date'],
+        ) if live['folder'] else []
+        values.update({('folder', f['id']): f for f in folders})
+        if self.env.su:
+            readable_folder_ids = deleted_folder_ids
+        else:
+            readable_folder_ids = set(self.env['custom.document.folder'].search(
+                [('id', 'in', list(deleted_folder_ids))]).ids) if deleted_folder_ids else set()
+
+        changes = []
+        for (item_type, res_id), (change_type, folder_id, owner_id) in latest.items():
+            if change_type == 'deleted':
+                if owner_id == self.env.uid or folder_id in readable_folder_ids:
+                    changes.append({'type': item_type, 'id': res_id, 'change': 'deleted'})
+                continue
+            vals = values.get((item_type, res_id))
+            if not vals:
+                continue
+            if item_type == 'document' and not vals['active']:
+                # trashed after this change; the later 'deleted' row covers it
+                continue
+            changes.append({'type': item_type, 'id': res_id, 'change': change_type, 'values': vals})
+        return changes
+
+    @api.autovacuum
+    def _gc_change_journal(self):
+        """Drop old entries; clients behind this point are told to re-list."""
+        self.env.cr.execute("""
+            DELETE FROM custom_document_change
+             WHERE changed_at < (now() at time zone 'UTC') - make_interval(days => %s)
+         RETURNING txid
+        """, (CHANGE_JOURNAL_RETENTION_DAYS,))
+        deleted = [row[0] for row in self.env.cr.fetchall()]
+        if deleted:
+            ICP = self.env['ir.config_parameter'].sudo()
+            horizon = max(int(ICP.get_param(CHANGE_JOURNAL_HORIZON_PARAM, 0)), max(deleted))
+            ICP.set_param(CHANGE_JOURNAL_HORIZON_PARAM, horizon)
+
+
+class CustomDocumentJournal(models.Model):
+    _inherit = 'custom.document'
+
+    def _journal(self, change_type, old_paths=None):
+        docs = self.sudo()
+        self.env['custom.document.change']._record(
+            'document', change_type, [(doc.id, doc.folder_id.id, doc.user_id.id) for doc in docs],
+            [doc.folder_id.parent_path for doc in docs], old_paths,
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        docs = super().create(vals_list)
+        docs._journal('created')
+        return docs
+
+    def write(self, vals):
+        keys = set(vals) - JOURNAL_IGNORED_FIELDS
+        if vals.get('storage_tier') == 'cold':
+            keys.discard('file')
+        old_paths = [doc.folder_id.parent_path for doc in self.sudo()] if 'folder_id' in keys else None
+        res = super().write(vals)
+        if 'active' in keys:
+            self._journal('created' if vals['active'] else 'deleted')
+            keys.discard('active')
+        if 'folder_id' in keys:
+            self._journal('moved', old_paths)
+            keys.discard('folder_id')
+        if keys:
+            self._journal('updated')
+        return res
+
+    def unlink(self):
+        self.with_context(active_test=False)._journal('deleted')
+        return super().unlink()
+
+
+class CustomDocumentFolderJournal(models.Model):
+    _inherit = 'custom.document.folder'
+
+    def _journal(self, change_type, old_paths=None):
+        folders = self.sudo()
+        self.env['custom.document.change']._record(
+            'folder', change_type, [(f.id, f.parent_id.id, f.user_id.id) for f in folders],
+            folders.mapped('parent_path'), old_paths,
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        folders = super().create(vals_list)
+        folders._journal('created')
+        return folders
+
+    def write(self, vals):
+        if (vals.keys() & SUBTREE_FIELDS and not vals.keys() - SUBTREE_FIELDS
+                and not self.env.context.get('folder_orm_write')):
+            # recorded by _move_subtree()
+            return super().write(vals)
+        old_paths = self.mapped('parent_path') if 'parent_id' in vals else None
+        res = super().write(vals)
+        self._journal('moved' if old_paths else 'updated', old_paths)
+        if old_paths:
+            self._journal_subtree('moved', old_paths)
+        return res
+
+    def _move_subtree(self, parent_id, name):
+        old_path = self.parent_path
+        moved = parent_id != self.parent_id.id
+        res = super()._move_subtree(parent_id, name)
+        self._journal('moved' if moved else 'updated', [old_path] if moved else None)
+        if moved:
+            self._journal_subtree('moved', [old_path])
+        return res
+
+    def _journal_subtree(self, change_type, old_paths=None):
+        """Record the descendant folders of self, and the documents of the subtrees.
+
+        The database moves them with their root (parent_path rewrite) or
+        drops them with it (ondelete cascade), without going through the ORM.
+        ``old_paths`` are the parent_path of self before a move.
+        """
+        if not self:
+            return
+        self.flush_model(['parent_path', 'parent_id', 'user_id'])
+        self.env['custom.document'].flush_model(['folder_id', 'user_id'])
+        self.env.cr.execute("""
+            WITH root AS (
+                SELECT * FROM unnest(%(ids)s::int[], %(paths)s::varchar[], %(old_paths)s::varchar[])
+                           AS r(id, path, old_path)
+            )
+            INSERT INTO custom_document_change
+                   (item_type, change_type, res_id, folder_id, owner_id, folder_path, old_folder_path, changed_at)
+            SELECT 'folder', %(change_type)s, f.id, f.parent_id, f.user_id, f.parent_path,
+                   root.old_path || substr(f.parent_path, length(root.path) + 1), (now() at time zone 'UTC')
+              FROM root
+              JOIN custom_document_folder f ON f.parent_path LIKE root.path || '%%' AND f.id != root.id
+            UNION ALL
+            SELECT 'document', %(change_type)s, d.id, d.folder_id, d.user_id, f.parent_path,
+                   root.old_path || substr(f.parent_path, length(root.path) + 1), (now() at time zone 'UTC')
+              FROM root
+              JOIN custom_document_folder f ON f.parent_path LIKE root.path || '%%'
+              JOIN custom_document d ON d.folder_id = f.id
+        """, {
+            'ids': self.ids,
+            'paths': self.mapped('parent_path'),
+            'old_paths': old_paths or [None] * len(self),
+            'change_type': change_type,
+        })
+
+    def unlink(self):
+        self._journal('deleted')
+        self._journal_subtree('deleted')
+        return super().unlink()
@@ -1,8 +1,16 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
 
 EMPLOYEE_DEFAULT_CHILDREN = ["Contracts"]
 COMPANY_DEFAULT_CHILDREN = ["Projects", "Equipment", "Finance", "Marketing", "Admin", "Inbox"]
+COMPANY_ROOT_NAME = "Company"
+
+# Writes touching only these fields are routed through _move_subtree()
+SUBTREE_FIELDS = {'name', 'parent_id'}
+# Inputs of the memoized path lookup; changing one outdates it
+PATH_LOOKUP_FIELDS = {'name', 'parent_id', 'company_id', 'is_company_root'}
+# Bumped by those changes; part of the path lookup cache key
+PATH_GENERATION_PARAM = 'custom_documents.folder_path_generation'
 
 
 class DocumentFolder(models.Model):
@@ -70,6 +78,94 @@ class DocumentFolder(models.Model):
         if self._has_cycle():
             raise ValidationError(_('You cannot create recursive folders.'))
 
+    def write(self, vals):
+        """Rename/move folders with a set-based subtree rewrite.
+
+        The stored recursive ``complete_name`` would otherwise be recomputed and
+        written through the ORM for every descendant, one level at a time.
+        """
+        if (vals.keys() & SUBTREE_FIELDS and not vals.keys() - SUBTREE_FIELDS
+                and not self.env.context.get('folder_orm_write')):
+            for folder in self:
+                parent_id = vals['parent_id'] if 'parent_id' in vals else folder.parent_id.id
+                folder._move_subtree(
+                    parent_id.id if isinstance(parent_id, models.BaseModel) else parent_id,
+                    vals.get('name', folder.name),
+                )
+            return True
+        res = super().write(vals)
+        if vals.keys() & PATH_LOOKUP_FIELDS:
+            self._bump_path_generation()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._bump_path_generation()
+        return res
+
+    def _move_subtree(self, parent_id, name):
+        """Rename and/or re-parent this folder, rewriting ``parent_path`` and
+        ``complete_name`` of the whole subtree with a single UPDATE."""
+        self.ensure_one()
+        self.check_access('write')
+        if not name:
+            raise ValidationError(_('Folder name is required.'))
+
+        self.flush_model(['name', 'parent_id', 'parent_path', 'complete_name'])
+        parent = self.browse(parent_id or [])
+        old_path = self.parent_path
+        old_complete_name = self.complete_name or self.name
+        if parent and parent.parent_path.startswith(old_path):
+            raise ValidationError(_('You cannot create recursive folders.'))
+
+        new_path = '%s%s/' % (parent.parent_path if parent else '', self.id)
+        new_complete_name = '%s / %s' % (parent.complete_name, name) if parent else name
+
+        cr = self.env.cr
+        cr.execute("""
+            UPDATE custom_document_folder
+               SET name = %s, parent_id = %s, write_uid = %s, write_date = %s
+             WHERE id = %s
+        """, (name, parent.id or None, self.env.uid, fields.Datetime.now(), self.id))
+        cr.execute("""
+            UPDATE custom_document_folder
+               SET parent_path = %(new_path)s || substr(parent_path, %(path_cut)s),
+                   complete_name = %(new_name)s || substr(complete_name, %(name_cut)s)
+             WHERE parent_path LIKE %(old_path)s
+        """, {
+            'new_path': new_path,
+            'path_cut': len(old_path) + 1,
+            'new_name': new_complete_name,
+            'name_cut': len(old_complete_name) + 1,
+            'old_path': old_path + '%',
+        })
+        self._invalidate_folder_tree()
+        return True
+
+    def _invalidate_folder_tree(self):
+        """Drop cached folder values and resolved paths after raw SQL on the tree."""
+        self.invalidate_model()
+        self._bump_path_generation()
+
+    @api.model
+    def _get_path_generation(self):
+        # read in SQL: get_param() is itself cached and set_param() clears every cache
+        self.env.cr.execute("SELECT value FROM ir_config_parameter WHERE key = %s", (PATH_GENERATION_PARAM,))
+        row = self.env.cr.fetchone()
+        return row[0] if row else '0'
+
+    @api.model
+    def _bump_path_generation(self):
+        """Outdate the memoized path lookups of all workers once this transaction commits."""
+        self.env.cr.precommit.data[PATH_GENERATION_PARAM] = True
+        self.env.cr.execute("""
+            INSERT INTO ir_config_parameter (key, value, create_uid, create_date, write_uid, write_date)
+            VALUES (%(key)s, '1', %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC')
+            ON CONFLICT (key) DO UPDATE
+               SET value = (ir_config_parameter.value::bigint + 1)::text,
+                   write_uid = %(uid)s, write_date = now() at time zone 'UTC'
+        """, {'key': PATH_GENERATION_PARAM, 'uid': self.env.uid})
+
     def action_toggle_star(self):
         for rec in self:
             rec.is_starred = not rec.is_starred
@@ -115,23 +211,138 @@ class DocumentFolder(models.Model):
             },
         }
 
+    def _get_path_names(self):
+        """Return {folder_id: [ancestor names..., own name]} with a single read."""
+        ancestor_ids = {int(i) for f in self for i in (f.parent_path or '').split('/') if i}
+        names = {f['id']: f['name'] for f in self.sudo().browse(ancestor_ids).read(['name'])}
+        return {
+            f.id: [names.get(int(i), '') for i in (f.parent_path or '').split('/') if i]
+            for f in self
+        }
+
+    def action_download_zip(self):
+        """Download this folder and all its subfolders as a ZIP archive."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/documents/zip?folder_id={self.id}',
+            'target': 'self',
+        }
+
+    # Path resolver (shared by all modules)
+    @api.model
+    def _split_path(self, path):
+        """Normalize a 'A/B/C' string (or a list of names) into a tuple of segments."""
+        if isinstance(path, str):
+            path = path.split('/')
+        return tuple(part.strip() for part in path or () if part and part.strip() not in ('', '.'))
+
+    @api.model
+    def _find_child(self, company_id, parent_id, name):
+        """Return the folder named ``name`` directly under ``parent_id``, as seen by the caller."""
+        if not parent_id and name == COMPANY_ROOT_NAME:
+            domain = [('is_company_root', '=', True), ('company_id', '=', company_id)]
+        elif not parent_id:
+            domain = [('name', '=', name), ('company_id', '=', company_id)]
+        else:
+            domain = [('name', '=', name)]
+        return self.search(domain + [('parent_id', '=', parent_id)], limit=1)
+
+    @api.model
+    def _lookup_path_id(self, company_id, parent_id, parts):
+        """Id of the folder at ``parts``, or False, regardless of access rights.
+
+        Memoized per worker and generation. A transaction that changed the
+        tree walks it uncached: its uncommitted state must not be memoized.
+        """
+        try:
+            if self.env.cr.precommit.data.get(PATH_GENERATION_PARAM):
+                self.flush_model(list(PATH_LOOKUP_FIELDS))
+                return self._walk_path_id(company_id, parent_id, parts)
+            return self._lookup_cached_path_id(company_id, parent_id, parts, self._get_path_generation())
+        except KeyError:
+            return False
+
+    @api.model
+    @tools.ormcache('company_id', 'parent_id', 'parts', 'generation')
+    def _lookup_cached_path_id(self, company_id, parent_id, parts, generation):
+        """A miss raises KeyError so that it is not memoized: folders created
+        through the ORM would otherwise stay "not found"."""
+        return self._walk_path_id(company_id, parent_id, parts)
+
+    @api.model
+    def _walk_path_id(self, company_id, parent_id, parts):
+        Folder = self.sudo()
+        for part in parts:
+            folder = Folder._find_child(company_id, parent_id, part)
+            if not folder:
+                raise KeyError(part)
+            parent_id = folder.id
+        return parent_id
+
+    @api.model
+    def _resolve_path(self, path, company=None, parent=None, create=True, vals=None):
+        """Return the folder at ``path`` (e.g. 'Company/Equipment/Microscopes').
+
+        ``path`` is relative to ``parent`` (or to the top of the tree) and may
+        also be given as a list of names. Missing segments are created unless
+        ``create`` is False; ``vals`` only applies to a newly created leaf.
+        """
+        company = company or self.env.company
+        parts = self._split_path(path)
+        if not parts:
+            return parent or self.browse()
+        folder = self.browse(self._lookup_path_id(company.id, parent.id if parent else False, parts))
+        if folder and not self.env.su:
+            # the memoized lookup is shared by all users: apply the caller's rules
+            folder = folder._filtered_access('read')
+        if folder:
+            return folder
+        if not create:
+            return self.browse()
+        return self._create_path(parts, company, parent, vals=vals)[0]
+
+    @api.model
+    def _create_path(self, path, company, parent=None, vals=None):
+        """Walk ``path`` creating missing segments; return (leaf, created folders)."""
+        parts = self._split_path(path)
+        created = self.browse()
+        current = parent or self.browse()
+        for index, part in enumerate(parts):
+            folder = self._find_child(company.id, current.id, part)
+            if not folder and not self.env.su:
+                # hidden from the caller: walk through it rather than create a twin
+                folder = self.sudo()._find_child(company.id, current.id, part).with_env(self.env)
+            if not folder and not current and part == COMPANY_ROOT_NAME:
+                folder = self._get_company_root(company)
+            elif not folder:
+                folder_vals = {
+                    'name': part,
+                    'parent_id': current.id or False,
+                    'company_id': company.id,
+                    'user_id': self.env.user.id,
+                }
+                if vals and index == len(parts) - 1:
+                    folder_vals.update(vals)
+                folder = self.create(folder_vals)
+                created |= folder
+            current = folder
+        return current, created
+
     # Helper methods for company/employee structure
     @api.model
     def _get_company_root(self, company):
         """Return the single Company root for a given company (create if missing)."""
-        root = self.sudo().search([
-            ('company_id', '=', company.id),
-            ('is_company_root', '=', True),
-            ('parent_id', '=', False),
-        ], limit=1)
-        if not root:
-            root = self.sudo().create({
-                'name': 'Company',
-                'company_id': company.id,
-                'user_id': self.env.user.id,
-                'is_company_root': True,
-                'sequence': 5,
-            })
+        root_id = self._lookup_path_id(company.id, False, (COMPANY_ROOT_NAME,))
+        if root_id:
+            return self.sudo().browse(root_id)
+        root = self.sudo().create({
+            'name': COMPANY_ROOT_NAME,
+            'company_id': company.id,
+            'user_id': self.env.user.id,
+            'is_company_root': True,
+            'sequence': 5,
+        })
         return root
 
     @api.model
@@ -139,6 +350,10 @@ class DocumentFolder(models.Model):
         """Return the 'Employees – <Company>' folder (child of Company root)."""
         root = self._get_company_root(company)
         wanted_name = f"Employees - {company.name}"
+        emp_root = self.sudo()._resolve_path([wanted_name], company=company, parent=root, create=False)
+        if emp_root.is_employees_root:
+            return emp_root
+        # Not found under the expected name: the company may have been renamed
         emp_root = self.sudo().search([
             ('parent_id', '=', root.id),
             ('company_id', '=', company.id),
@@ -161,18 +376,7 @@ class DocumentFolder(models.Model):
         """Seed standard top-level folders under Company."""
         root = self._get_company_root(company)
         for name in COMPANY_DEFAULT_CHILDREN:
-            exists = self.sudo().search([
-                ('name', '=', name),
-                ('parent_id', '=', root.id),
-                ('company_id', '=', company.id),
-            ], limit=1)
-            if not exists:
-                self.sudo().create({
-                    'name': name,
-                    'parent_id': root.id,
-                    'company_id': company.id,
-                    'user_id': self.env.user.id,
-                })
+            self.sudo()._resolve_path([name], company=company, parent=root)
 
     @api.model
     def _ensure_employee_folder(self, emp):
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+
+from PIL import Image, ImageOps
+
+from odoo import api, fields, models
+from odoo.http import Stream
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Requested sizes snap up to one of these, so the cache stays small
+IMAGE_DERIVATIVE_SIZES = (128, 400, 1024, 1920)
+# Rendered in the background right after upload (list and preview sizes)
+IMAGE_PREGENERATED_SIZES = (128, 400)
+IMAGE_DERIVATIVE_MIMETYPES = {
+    'image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp', 'image/bmp', 'image/tiff',
+}
+# Formats that may carry transparency fall back to PNG rather than JPEG
+IMAGE_ALPHA_MIMETYPES = {'image/png', 'image/gif', 'image/webp'}
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', 'image/png', {'optimize': True}),
+}
+DERIVATIVE_CACHE_MB = 1024
+DERIVATIVE_BATCH_SIZE = 50
+
+
+def render_derivative(fileobj, size, ext, target_path):
+    """Write ``fileobj`` downscaled to fit ``size`` x ``size`` at ``target_path``."""
+    pil_format, _mimetype, options = DERIVATIVE_FORMATS[ext]
+    with Image.open(fileobj) as img:
+        # JPEG decodes straight at a reduced scale; a no-op for other formats
+        img.draft('RGB', (size, size))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size), Image.LANCZOS)
+        if ext == 'jpg' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        elif img.mode == 'P':
+            img = img.convert('RGBA')
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        tmp_path = target_path + '.tmp'
+        img.save(tmp_path, format=pil_format, **options)
+    os.replace(tmp_path, target_path)
+
+
+class CustomDocumentImage(models.Model):
+    _inherit = 'custom.document'
+
+    image_derivatives_pending = fields.Boolean(copy=False, readonly=True, index=True)
+
+    # -------------------------------------------------------------------------
+    # Helpers
+    # -------------------------------------------------------------------------
+    @api.model
+    def _get_derivative_root(self):
+        return os.path.join(config['data_dir'], 'documents_derivatives', self.env.cr.dbname)
+
+    @api.model
+    def _get_derivative_cache_bytes(self):
+        param = self.env['ir.config_parameter'].sudo().get_param(
+            'custom_documents.derivative_cache_mb', DERIVATIVE_CACHE_MB)
+        try:
+            return int(param) * 1024 * 1024
+        except (TypeError, ValueError):
+            return DERIVATIVE_CACHE_MB * 1024 * 1024
+
+    def _is_image_derivable(self):
+        self.ensure_one()
+        return self.document_type == 'file' and (self.mimetype or '').lower() in IMAGE_DERIVATIVE_MIMETYPES
+
+    @api.model
+    def _pick_derivative_size(self, size):
+        """Smallest derivative size covering ``size``; None means the original."""
+        return next((s for s in IMAGE_DERIVATIVE_SIZES if s >= size), None)
+
+    def _get_image_derivative(self, size, webp=True):
+        """Return ``(path, ext)`` of a cached derivative, rendering it on a miss.
+
+        Returns None when the original should be served instead.
+        """
+        self.ensure_one()
+        bucket = self._pick_derivative_size(size)
+        if not bucket or not self._is_image_derivable():
+            return None
+        checksum = self._get_content_checksum()
+        if not checksum:
+            return None
+        if webp:
+            ext = 'webp'
+        else:
+            ext = 'png' if (self.mimetype or '').lower() in IMAGE_ALPHA_MIMETYPES else 'jpg'
+        path = os.path.join(self._get_derivative_root(), checksum[:2], f"{checksum}_{bucket}.{ext}")
+        if os.path.isfile(path):
+            # the mtime drives the LRU eviction of the cache
+            os.utime(path)
+            return path, ext
+        try:
+            with self._open_content() as fileobj:
+                render_derivative(fileobj, bucket, ext, path)
+        except Exception:
+            _logger.warning("Could not render %spx derivative of document %s", bucket, self.id, exc_info=True)
+            return None
+        return path, ext
+
+    def _get_image_derivative_stream(self, size, webp=True):
+        """Stream for a resized variant of the image, or None to serve the original."""
+        derivative = self._get_image_derivative(size, webp=webp)
+        if not derivative:
+            return None
+        path, ext = derivative
+        stem = os.path.splitext(self.file_name or self.name or 'image')[0]
+        return Stream(
+            type='path',
+            path=path,
+            mimetype=DERIVATIVE_FORMATS[ext][1],
+            download_name=f"{stem}.{ext}",
+            size=os.path.getsize(path),
+            etag=os.path.basename(path),
+            last_modified=os.path.getmtime(path),
+            conditional=True,
+            max_age=86400,
+        )
+
+    # -------------------------------------------------------------------------
+    # CRUD
+    # -------------------------------------------------------------------------
+    @api.model_create_multi
+    def create(self, vals_list):
+        docs = super().create(vals_list)
+        docs._queue_image_derivatives()
+        return docs
+
+    def write(self, vals):
+        res = super().write(vals)
+        if vals.get('file') or 'mimetype' in vals:
+            self._queue_image_derivatives()
+        return res
+
+    def _queue_image_derivatives(self):
+        images = self.filtered(lambda d: d._is_image_derivable())
+        if not images:
+            return
+        self.env.cr.execute(
+            "UPDATE custom_document SET image_derivatives_pending = true WHERE id IN %s",
+            (tuple(images.ids),))
+        images.invalidate_recordset(['image_derivatives_pending'])
+        cron = self.env.ref('custom_documents.ir_cron_image_derivatives', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    # -------------------------------------------------------------------------
+    # Background rendering & cache bound
+    # -------------------------------------------------------------------------
+    @api.model
+    def _cron_generate_image_derivatives(self, batch_size=DERIVATIVE_BATCH_SIZE, auto_commit=True):
+        """Render the preview sizes of newly uploaded images, in chunks."""
+        Doc = self.sudo().with_context(active_test=False)
+        while True:
+            docs = Doc.search([('image_derivatives_pending', '=', True)], limit=batch_size, order='id')
+            if not docs:
+                break
+            for doc in docs:
+                for size in IMAGE_PREGENERATED_SIZES:
+                    doc._get_image_derivative(size, webp=True)
+                    doc._get_image_derivative(size, webp=False)
+            self.env.cr.execute(
+                "UPDATE custom_document SET image_derivatives_pending = false WHERE id IN %s",
+                (tuple(docs.ids),))
+            docs.invalidate_recordset(['image_derivatives_pending'])
+            if auto_commit:
+                self.env.cr.commit()
+        self._gc_image_derivatives()
+
+    @api.autovacuum
+    def _gc_image_derivatives(self):
+        """Evict the least recently used derivatives beyond the cache size."""
+        root = self._get_derivative_root()
+        if not os.path.isdir(root):
+            return
+        entries, total = [], 0
+        for bucket in os.scandir(root):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        limit = self._get_derivative_cache_bytes()
+        if total <= limit:
+            return
+        # trim to 90% so the next few renders don't trigger another pass
+        target = limit * 0.9
+        for _mtime, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from odoo import models, tools, _
+from odoo.exceptions import UserError
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+
+
+def parse_page_ranges(spec, page_count):
+    """Parse "1-3, 5, 8-" into [(1, 3), (5, 5), (8, page_count)] (1-based, inclusive)."""
+    ranges = []
+    for part in (spec or '').replace(' ', '').split(','):
+        if not part:
+            continue
+        first, sep, last = part.partition('-')
+        try:
+            first = int(first) if first else 1
+            last = (int(last) if last else page_count) if sep else first
+        except ValueError:
+            raise UserError(_('Invalid page range "%s".') % part)
+        if not 1 <= first <= last <= page_count:
+            raise UserError(_('Page range "%s" is outside of the document (1-%s).') % (part, page_count))
+        ranges.append((first, last))
+    if not ranges:
+        raise UserError(_("Please enter at least one page range."))
+    return ranges
+
+
+class CustomDocumentPdf(models.Model):
+    _inherit = 'custom.document'
+
+    def _is_pdf(self):
+        self.ensure_one()
+        return self.document_type == 'file' and (
+            'pdf' in (self.mimetype or '').lower()
+            or (self.file_name or '').lower().endswith('.pdf')
+        )
+
+    @contextmanager
+    def _open_pdf_stream(self):
+        """Yield a seekable stream on the PDF without loading it in memory.
+
+        The reader only parses the cross-reference table up front and loads
+        page objects on demand, so it must be able to seek in the file.
+        """
+        path, compressed, data = self._get_content_source()
+        if path is None:
+            yield io.BytesIO(data)
+        elif not compressed:
+            with open(path, 'rb') as stream:
+                yield stream
+        else:
+            # gzip seeks backwards by re-reading; spool it once instead
+            with self._open_content() as source, tempfile.TemporaryFile() as stream:
+                shutil.copyfileobj(source, stream)
+                stream.seek(0)
+                yield stream
+
+    @tools.ormcache('checksum')
+    def _get_pdf_page_count_cached(self, checksum, document_id):
+        doc = self.browse(document_id)
+        with doc._open_pdf_stream() as stream:
+            return PdfFileReader(stream, strict=False).getNumPages()
+
+    def _get_pdf_page_count(self):
+        """Page count, cached per content hash (identical files share it)."""
+        self.ensure_one()
+        checksum = self._get_content_checksum()
+        if not checksum:
+            with self._open_pdf_stream() as stream:
+                return PdfFileReader(stream, strict=False).getNumPages()
+        return self._get_pdf_page_count_cached(checksum, self.id)
+
+    def _split_pdf(self, ranges, folder=None):
+        """Create one document per (first, last) page range and return them.
+
+        Only the pages of the current range are loaded, and each output is
+        spooled to a temporary file and streamed to the filestore before the
+        next one is built.
+        """
+        self.ensure_one()
+        if not self._is_pdf():
+            raise UserError(_("Only PDF documents can be split."))
+        self.check_access('read')
+        folder = folder or self.folder_id
+        stem = os.path.splitext(self.file_name or self.name or 'document')[0]
+        new_docs = self.browse()
+        with self._open_pdf_stream() as stream:
+            reader = PdfFileReader(stream, strict=False)
+            for first, last in ranges:
+                writer = PdfFileWriter()
+                for index in range(first - 1, last):
+                    writer.addPage(reader.getPage(index))
+                pages = str(first) if first == last else f"{first}-{last}"
+                file_name = f"{stem} (p. {pages}).pdf"
+                with tempfile.TemporaryFile() as output:
+                    writer.write(output)
+                    output.seek(0)
+                    new_docs |= self._create_from_stream({
+                        'name': file_name,
+                        'file_name': file_name,
+                        'mimetype': 'application/pdf',
+                        'folder_id': folder.id,
+                        'tag_ids': [(6, 0, self.tag_ids.ids)],
+                    }, output)
+        return new_docs
+
+    def action_split_pdf(self):
+        self.ensure_one()
+        if not self._is_pdf() or not self._has_content():
+            raise UserError(_("Only PDF documents can be split."))
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Split PDF'),
+            'res_model': 'custom.document.pdf.split.wizard',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {'default_document_id': self.id},
+        }
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Opt-in timing of the document controllers and heavy wizard actions.
+
+Every instrumented call appends one sample (SQL queries, SQL time, Python
+time, payload bytes) to an in-memory ring buffer of the current worker;
+the report and the ``/documents/perf/stats`` endpoint aggregate it into
+percentiles. Nothing is written to the database on the request path.
+"""
+import functools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+from odoo import api, fields, models, _
+from odoo.http import request
+
+_logger = logging.getLogger(__name__)
+
+PERF_PARAM = 'custom_documents.perf_instrumentation'
+PERF_RING_SIZE = 5000
+PERF_SLOWEST_COUNT = 20
+
+# {dbname: deque of samples}; per worker process
+_samples = defaultdict(lambda: deque(maxlen=PERF_RING_SIZE))
+_samples_lock = threading.Lock()
+
+
+def _payload_bytes(result):
+    """Size of a controller result: response body or JSON-RPC value."""
+    length = getattr(result, 'content_length', None)
+    if length is not None:
+        return length
+    if isinstance(result, (dict, list)):
+        return len(json.dumps(result, default=str))
+    return 0
+
+
+def instrument(operation, payload=None):
+    """Record a sample per call of the decorated controller or model method.
+
+    ``payload(self, result)`` returns the bytes handled by the call; it
+    defaults to the size of the response for controllers and to 0 for model
+    methods. Put it below ``http.route``.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            env = getattr(self, 'env', None) or request.env
+            if not env['ir.config_parameter'].sudo().get_param(PERF_PARAM):
+                return method(self, *args, **kwargs)
+
+            thread = threading.current_thread()
+            # set by the HTTP and cron workers; plain shells only have the cursor count
+            has_thread_stats = hasattr(thread, 'query_count')
+            queries_before = thread.query_count if has_thread_stats else env.cr.sql_log_count
+            sql_before = thread.query_time if has_thread_stats else 0.0
+            started = time.perf_counter()
+            result = method(self, *args, **kwargs)
+            elapsed = time.perf_counter() - started
+            queries_after = thread.query_count if has_thread_stats else env.cr.sql_log_count
+            sql_time = (thread.query_time - sql_before) if has_thread_stats else 0.0
+            try:
+                if payload:
+                    size = payload(self, result)
+                else:
+                    size = 0 if isinstance(self, models.BaseModel) else _payload_bytes(result)
+            except Exception:
+                _logger.debug("Could not measure the payload of %s", operation, exc_info=True)
+                size = 0
+            record_sample(env.cr.dbname, operation, {
+                'queries': queries_after - queries_before,
+                'sql_ms': sql_time * 1000,
+                'python_ms': max(elapsed - sql_time, 0.0) * 1000,
+                'total_ms': elapsed * 1000,
+                'bytes': size or 0,
+            })
+            return result
+        return wrapper
+    return decorator
+
+
+def record_sample(dbname, operation, values):
+    sample = dict(values, operation=operation, at=time.time())
+    with _samples_lock:
+        _samples[dbname].append(sample)
+
+
+def reset_samples(dbname):
+    with _samples_lock:
+        _samples.pop(dbname, None)
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def get_perf_stats(dbname, slowest=PERF_SLOWEST_COUNT):
+    """Aggregate the buffered samples per operation, slowest (p95) first."""
+    with _samples_lock:
+        samples = list(_samples.get(dbname, ()))
+    by_operation = defaultdict(list)
+    for sample in samples:
+        by_operation[sample['operation']].append(sample)
+
+    operations = []
+    for operation, group in by_operation.items():
+        calls = len(group)
+        totals = sorted(s['total_ms'] for s in group)
+        operations.append({
+            'operation': operation,
+            'calls': calls,
+            'p50_ms': round(_percentile(totals, 50), 2),
+            'p95_ms': round(_percentile(totals, 95), 2),
+            'p99_ms': round(_percentile(totals, 99), 2),
+            'max_ms': round(totals[-1], 2),
+            'avg_queries': round(sum(s['queries'] for s in group) / calls, 1),
+            'max_queries': max(s['queries'] for s in group),
+            'avg_sql_ms': round(sum(s['sql_ms'] for s in group) / calls, 2),
+            'avg_python_ms': round(sum(s['python_ms'] for s in group) / calls, 2),
+            'avg_bytes': int(sum(s['bytes'] for s in group) / calls),
+        })
+    operations.sort(key=lambda op: op['p95_ms'], reverse=True)
+
+    slowest_calls = sorted(samples, key=lambda s: s['total_ms'], reverse=True)[:slowest]
+    return {
+        'worker_pid': os.getpid(),
+        'buffer_size': PERF_RING_SIZE,
+        'samples': len(samples),
+        'operations': operations,
+        'slowest_calls': [{
+            'operation': s['operation'],
+            'at': fields.Datetime.to_string(datetime.fromtimestamp(s['at'], timezone.utc).replace(tzinfo=None)),
+            'total_ms': round(s['total_ms'], 2),
+            'queries': s['queries'],
+            'sql_ms': round(s['sql_ms'], 2),
+            'python_ms': round(s['python_ms'], 2),
+            'bytes': s['bytes'],
+        } for s in slowest_calls],
+    }
+
+
+def attachment_payload(records, *field_names):
+    """Bytes stored in the binary (attachment) fields of ``records``."""
+    if not records:
+        return 0
+    records.env.cr.execute("""
+        SELECT COALESCE(SUM(file_size), 0)
+          FROM ir_attachment
+         WHERE res_model = %s AND res_field IN %s AND res_id IN %s
+    """, (records._name, field_names, tuple(records.ids)))
+    return records.env.cr.fetchone()[0]
+
+
+class CustomDocumentPerfStat(models.TransientModel):
+    """Snapshot of the aggregated samples, for the settings report.
+
+    Only the samples of the worker that opened the report are shown; with
+    several workers, each one holds its own buffer.
+    """
+    _name = 'custom.document.perf.stat'
+    _description = 'Documents Performance Statistics'
+    _order = 'p95_ms desc'
+
+    worker_pid = fields.Integer('Worker', readonly=True,
+                                help='Process the samples were taken from. Each worker keeps its own '
+                                     'samples in memory, so the numbers only cover the calls it served.')
+    operation = fields.Char('Operation', readonly=True)
+    calls = fields.Integer('Calls', readonly=True)
+    p50_ms = fields.Float('p50 (ms)', readonly=True, digits=(16, 1))
+    p95_ms = fields.Float('p95 (ms)', readonly=True, digits=(16, 1))
+    p99_ms = fields.Float('p99 (ms)', readonly=True, digits=(16, 1))
+    max_ms = fields.Float('Max (ms)', readonly=True, digits=(16, 1))
+    avg_queries = fields.Float('Avg Queries', readonly=True, digits=(16, 1))
+    max_queries = fields.Integer('Max Queries', readonly=True)
+    avg_sql_ms = fields.Float('Avg SQL (ms)', readonly=True, digits=(16, 1))
+    avg_python_ms = fields.Float('Avg Python (ms)', readonly=True, digits=(16, 1))
+    avg_kib = fields.Float('Avg Payload (KiB)', readonly=True, digits=(16, 1))
+
+    @api.model
+    def action_open_report(self):
+        stats = get_perf_stats(self.env.cr.dbname)
+        records = self.create([{
+            'worker_pid': stats['worker_pid'],
+            'operation': op['operation'],
+            'calls': op['calls'],
+            'p50_ms': op['p50_ms'],
+            'p95_ms': op['p95_ms'],
+            'p99_ms': op['p99_ms'],
+            'max_ms': op['max_ms'],
+            'avg_queries': op['avg_queries'],
+            'max_queries': op['max_queries'],
+            'avg_sql_ms': op['avg_sql_ms'],
+            'avg_python_ms': op['avg_python_ms'],
+            'avg_kib': op['avg_bytes'] / 1024,
+        } for op in stats['operations']])
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Documents Performance (worker %s)', stats['worker_pid']),
+            'res_model': self._name,
+            'view_mode': 'list',
+            'domain': [('id', 'in', records.ids)],
+            'target': 'current',
+        }
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+from odoo.osv import expression
+
+EXPIRY_BATCH_SIZE = 200
+EXPIRY_ACTIONS = [
+    ('archive', 'Move to Trash'),
+    ('purge', 'Delete Permanently'),
+    ('notify', 'Notify Owner'),
+]
+# Rule fields that change which documents a rule holds or their expiry date
+RULE_APPLY_FIELDS = {'folder_id', 'tag_id', 'duration', 'duration_unit', 'expiry_action', 'sequence', 'active'}
+
+
+class CustomDocumentRetentionRule(models.Model):
+    """Give documents of a folder subtree and/or tag an expiry date."""
+    _name = 'custom.document.retention.rule'
+    _description = 'Document Retention Rule'
+    _order = 'sequence, id'
+
+    name = fields.Char('Name', required=True)
+    sequence = fields.Integer(default=10, help='The first matching rule applies.')
+    active = fields.Boolean(default=True)
+    folder_id = fields.Many2one('custom.document.folder', 'Folder', ondelete='cascade',
+                                help='Applies to documents in this folder and its subfolders.')
+    tag_id = fields.Many2one('custom.document.tag', 'Tag', ondelete='cascade')
+    duration = fields.Integer('Keep For', required=True, default=1)
+    duration_unit = fields.Selection([
+        ('days', 'Days'),
+        ('months', 'Months'),
+        ('years', 'Years'),
+    ], string='Unit', required=True, default='years')
+    expiry_action = fields.Selection(EXPIRY_ACTIONS, string='On Expiry', required=True, default='archive')
+    share_duration_days = fields.Integer(
+        'Share Expiry (days)',
+        help='People the documents are shared with lose access after this many days. 0 keeps shares.'
+    )
+
+    @api.constrains('folder_id', 'tag_id', 'duration')
+    def _check_scope(self):
+        for rule in self:
+            if not rule.folder_id and not rule.tag_id:
+                raise ValidationError(_('A retention rule needs a folder, a tag or both.'))
+            if rule.duration <= 0:
+                raise ValidationError(_('The retention period must be positive.'))
+
+    def _get_interval(self):
+        self.ensure_one()
+        return '%s %s' % (self.duration, self.duration_unit)
+
+    def _matches(self, doc):
+        self.ensure_one()
+        if self.folder_id and not (doc.folder_id.parent_path or '').startswith(self.folder_id.parent_path):
+            return False
+        return not self.tag_id or self.tag_id in doc.tag_ids
+
+    def _get_scope_domain(self):
+        """Documents possibly affected by self (index lookups on folder and tags)."""
+        domains = []
+        for rule in self:
+            domain = []
+            if rule.folder_id:
+                domain.append(('folder_id', 'child_of', rule.folder_id.id))
+            if rule.tag_id:
+                domain.append(('tag_ids', 'in', rule.tag_id.id))
+            domains.append(domain)
+        return expression.OR(domains)
+
+    def _reapply(self, domain=None):
+        if not self and not domain:
+            return
+        docs = self.env['custom.document'].sudo().search(domain or self._get_scope_domain())
+        docs._apply_retention_rules(force=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        rules._reapply()
+        return rules
+
+    def write(self, vals):
+        old_scope = self._get_scope_domain() if vals.keys() & {'folder_id', 'tag_id'} else None
+        res = super().write(vals)
+        if old_scope:
+            self._reapply(old_scope)
+        if vals.keys() & RULE_APPLY_FIELDS:
+            self._reapply()
+        return res
+
+    def unlink(self):
+        # documents already processed by these rules stay processed
+        docs = self.env['custom.document'].sudo().search([
+            ('retention_rule_id', 'in', self.ids), ('expires_at', '!=', False),
+        ])
+        res = super().unlink()
+        docs._apply_retention_rules(force=True)
+        return res
+
+
+class CustomDocumentRetention(models.Model):
+    _inherit = 'custom.document'
+
+    expires_at = fields.Datetime('Expires On', index='btree_not_null', copy=False, tracking=True)
+    expiry_action = fields.Selection(EXPIRY_ACTIONS, string='On Expiry', default='notify', copy=False)
+    retention_rule_id = fields.Many2one('custom.document.retention.rule', 'Retention Rule',
+                                        readonly=True, copy=False, ondelete='set null')
+
+    def _apply_retention_rules(self, force=False):
+        """Set expires_at from the first matching rule; set-based, one UPDATE per rule.
+
+        Expiry dates entered by hand (no rule) are left alone, and so are
+        documents whose rule did not change unless ``force`` is set (the
+        rule itself was edited). Documents the rule already processed (rule
+        set, expiry cleared by the cron) are never given a new date by it.
+        """
+        docs = self.sudo().filtered(lambda d: d.active and (d.retention_rule_id or not d.expires_at))
+        if not docs:
+            return
+        rules = self.env['custom.document.retention.rule'].sudo().search([])
+        by_rule = defaultdict(list)
+        for doc in docs:
+            rule = next((r for r in rules if r._matches(doc)), rules.browse())
+            if rule == doc.retention_rule_id and (not force or not doc.expires_at):
+                continue
+            by_rule[rule].append(doc.id)
+
+        cr = self.env.cr
+        for rule, ids in by_rule.items():
+            if rule:
+                cr.execute("""
+                    UPDATE custom_document
+                       SET retention_rule_id = %s, expiry_action = %s,
+                           expires_at = create_date + %s::interval
+                     WHERE id IN %s
+                """, (rule.id, rule.expiry_action, rule._get_interval(), tuple(ids)))
+                if rule.share_duration_days:
+                    cr.execute("""
+                        UPDATE custom_document_share_line
+                           SET expires_at = create_date + make_interval(days => %s)
+                         WHERE document_id IN %s AND expires_at IS NULL
+                    """, (rule.share_duration_days, tuple(ids)))
+            else:
+                cr.execute("""
+                    UPDATE custom_document
+                       SET retention_rule_id = NULL, expires_at = NULL
+                     WHERE id IN %s AND retention_rule_id IS NOT NULL
+                """, (tuple(ids),))
+        docs.invalidate_recordset(['expires_at', 'expiry_action', 'retention_rule_id'])
+        self.env['custom.document.share.line'].invalidate_model(['expires_at'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        docs = super().create(vals_list)
+        docs._apply_retention_rules()
+        return docs
+
+    def write(self, vals):
+        if vals.get('expires_at') and 'retention_rule_id' not in vals:
+            # a date set by hand overrides the rules
+            vals = dict(vals, retention_rule_id=False)
+        res = super().write(vals)
+        if vals.keys() & {'folder_id', 'tag_ids'} or ('expires_at' in vals and not vals['expires_at']) \
+                or vals.get('active'):
+            self._apply_retention_rules()
+        return res
+
+    # -------------------------------------------------------------------------
+    # Enforcement
+    # -------------------------------------------------------------------------
+    @api.model
+    def _cron_process_expirations(self, batch_size=EXPIRY_BATCH_SIZE, auto_commit=True):
+        """Apply the expiry action of due documents and drop expired shares.
+
+        Both loops walk the expires_at indexes, which only hold rows that
+        have an expiry; processed documents leave the index.
+        """
+        now = fields.Datetime.now()
+        Doc = self.sudo().with_context(active_test=False)
+        while True:
+            docs = Doc.search([('expires_at', '<=', now), ('active', '=', True)],
+                              limit=batch_size, order='expires_at, id')
+            if not docs:
+                break
+            for action, group in docs.grouped('expiry_action').items():
+                if action == 'purge':
+                    group.unlink()
+                elif action == 'archive':
+                    group.write({'active': False, 'expires_at': False})
+                else:
+                    group._notify_expiry()
+                    group.write({'expires_at': False})
+            if auto_commit:
+                self.env.cr.commit()
+
+        ShareLine = self.env['custom.document.share.line'].sudo()
+        while True:
+            lines = ShareLine.search([('expires_at', '<=', now)], limit=batch_size, order='expires_at, id')
+            if not lines:
+                break
+            lines.unlink()
+            if auto_commit:
+                self.env.cr.commit()
+
+    def _notify_expiry(self):
+        for doc in self:
+            partner = doc.user_id.partner_id
+            doc.message_post(
+                body=_('%(doc)s has reached its retention date.') % {'doc': doc.name},
+                subject=_('Document Expired'),
+                message_type='notification',
+                subtype_xmlid='mail.mt_note',
+                partner_ids=partner.ids,
+            )
+
+
+class CustomDocumentShareLineRetention(models.Model):
+    _inherit = 'custom.document.share.line'
+
+    expires_at = fields.Datetime('Access Until', index='btree_not_null')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        for line in lines.filtered(lambda l: not l.expires_at):
+            days = line.document_id.retention_rule_id.share_duration_days
+            if days:
+                line.expires_at = fields.Datetime.now() + timedelta(days=days)
+        return lines
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import hmac
+import re
+import secrets
+import time
+from urllib.parse import quote
+
+from odoo import api, models
+
+SIGNED_URL_TTL_HOURS = 24
+# Expiries are rounded up to this step so that repeated calls return the
+# same URL for a while, which is what lets a reverse proxy cache it.
+SIGNED_URL_EXPIRY_STEP = 3600
+SIGNED_URL_ACCESS = ('view', 'download')
+CHECKSUM_RE = re.compile(r'^[0-9a-f]{40}$')
+
+
+def sign_content_url(secret, checksum, access, expires, filename):
+    """HMAC-SHA256 over the URL parameters; truncated hex is plenty for a URL."""
+    payload = f"{checksum}:{access}:{expires}:{filename}".encode()
+    return hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()[:32]
+
+
+class CustomDocumentSignedUrl(models.Model):
+    _inherit = 'custom.document'
+
+    @api.model
+    def _get_url_signing_secret(self):
+        """Current signing secret, or False. ``get_param`` is cached, so once
+        warm this costs no query; rotating the key clears that cache on every
+        worker. The key is created at install (data/ir_config_parameter.xml)."""
+        return self.env['ir.config_parameter'].sudo().get_param('custom_documents.url_signing_key') or False
+
+    @api.model
+    def _rotate_url_signing_key(self):
+        """Replace the signing secret, invalidating every URL signed so far."""
+        secret = secrets.token_hex(32)
+        self.env['ir.config_parameter'].sudo().set_param('custom_documents.url_signing_key', secret)
+        return secret
+
+    @api.model
+    def _get_signed_url_ttl(self):
+        param = self.env['ir.config_parameter'].sudo().get_param(
+            'custom_documents.signed_url_ttl_hours', SIGNED_URL_TTL_HOURS)
+        try:
+            return max(int(param), 1) * 3600
+        except (TypeError, ValueError):
+            return SIGNED_URL_TTL_HOURS * 3600
+
+    def _get_signed_url(self, access='view', ttl=None):
+        """Return a stateless URL to the content, or False if it can't be signed.
+
+        The URL carries the content hash, access level and expiry, so the
+        route serving it checks the signature and reads the filestore
+        without looking the document up. Cold documents are not in the
+        filestore and keep going through the regular routes.
+        """
+        self.ensure_one()
+        if access not in SIGNED_URL_ACCESS:
+            raise ValueError(access)
+        if self.document_type != 'file' or self.storage_tier == 'cold':
+            return False
+        checksum = self._get_content_checksum()
+        secret = self._get_url_signing_secret()
+        if not checksum or not secret:
+            return False
+        ttl = ttl or self._get_signed_url_ttl()
+        expires = -(-(int(time.time()) + ttl) // SIGNED_URL_EXPIRY_STEP) * SIGNED_URL_EXPIRY_STEP
+        filename = self.file_name or self.name or 'document'
+        signature = sign_content_url(secret, checksum, access, expires, filename)
+        return f"/documents/signed/{checksum}/{access}/{expires}/{signature}/{quote(filename, safe='')}"
@@ -0,0 +1,617 @@
+# -*- coding: utf-8 -*-
+import base64
+import functools
+import gzip
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.osv import expression
+from odoo.tools import SQL, config
+from odoo.tools.mimetypes import guess_mimetype
+
+_logger = logging.getLogger(__name__)
+
+COLD_STORAGE_DAYS = 365
+ARCHIVE_DIR_PARAM = 'custom_documents.archive_dir'
+COLD_STORAGE_BATCH_SIZE = 100
+ACCESS_TOUCH_INTERVAL = timedelta(days=1)
+STREAM_CHUNK_SIZE = 64 * 1024
+# Bytes looked at to sniff the mimetype, and kept from text files for search
+SNIFF_SIZE = 2048
+INDEX_CONTENT_SIZE = 64 * 1024
+
+# Sniffed types that say little on their own: the extension refines them
+GENERIC_MIMETYPES = {'application/octet-stream', 'application/zip', 'text/plain', 'application/x-empty'}
+# Containers (OOXML/ODF zips, OLE2) need the whole file to be told apart
+CONTAINER_SIGNATURES = (b'PK\x03\x04', b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1')
+INDEXED_MIMETYPES = {
+    'application/json', 'application/xml', 'application/javascript', 'application/csv', 'image/svg+xml',
+}
+
+# Mimetypes that shrink noticeably with gzip; already-compressed formats
+# (images, zip-based office files, archives, media) are stored as-is.
+COMPRESSIBLE_MIMETYPE_PREFIXES = ('text/',)
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/xml',
+    'application/javascript',
+    'application/rtf',
+    'application/msword',
+    'application/vnd.ms-excel',
+    'application/vnd.ms-powerpoint',
+    'application/postscript',
+    'application/x-tar',
+    'image/svg+xml',
+    'image/bmp',
+    'image/tiff',
+}
+
+
+def sniff_mimetype(head, file_name=None):
+    """Mimetype from the magic bytes of ``head``, refined by the file name."""
+    by_name = mimetypes.guess_type(file_name)[0] if file_name else None
+    if not head:
+        return by_name or 'application/octet-stream'
+    if head.startswith(CONTAINER_SIGNATURES):
+        return by_name or ('application/zip' if head.startswith(b'PK') else 'application/x-ole-storage')
+    guessed = guess_mimetype(head, default='application/octet-stream')
+    if guessed == 'application/octet-stream' and b'\x00' not in head:
+        try:
+            head.decode('utf-8')
+            guessed = 'text/plain'
+        except UnicodeDecodeError as error:
+            # a multi-byte character cut at the end of the head is still text
+            if error.reason == 'unexpected end of data':
+                guessed = 'text/plain'
+    if guessed in GENERIC_MIMETYPES and by_name:
+        return by_name
+    return guessed
+
+
+def is_indexable(mimetype):
+    mimetype = (mimetype or '').lower()
+    return mimetype.startswith('text/') or mimetype in INDEXED_MIMETYPES
+
+
+def open_binary_field(record, field_name):
+    """Open the attachment behind a binary field of ``record``, or return None."""
+    att = record.env['ir.attachment'].sudo().search([
+        ('res_model', '=', record._name),
+        ('res_field', '=', field_name),
+        ('res_id', '=', record.id),
+    ], limit=1)
+    if not att:
+        return None
+    if att.store_fname:
+        return open(att._full_path(att.store_fname), 'rb')
+    return io.BytesIO(att.raw or b'')
+
+
+def open_content_source(source):
+    """Open a source returned by ``custom.document._get_content_source()``."""
+    path, compressed, data = source
+    if path is None:
+        return io.BytesIO(data)
+    return gzip.open(path, 'rb') if compressed else open(path, 'rb')
+
+
+class CustomDocumentStorage(models.Model):
+    _inherit = 'custom.document'
+
+    storage_tier = fields.Selection(
+        [('hot', 'Hot'), ('cold', 'Cold Archive')],
+        string='Storage Tier', default='hot', required=True, copy=False, index=True, readonly=True
+    )
+    archive_path = fields.Char('Archive Path', copy=False, readonly=True,
+                               help='Path of the archived file, relative to the archive directory')
+    archive_compressed = fields.Boolean('Archived Compressed', copy=False, readonly=True)
+    archive_size = fields.Integer('Original Size', copy=False, readonly=True)
+    last_access_date = fields.Datetime('Last Accessed', copy=False, readonly=True, index=True)
+    content_sha256 = fields.Char('SHA-256', copy=False, readonly=True, index=True)
+    index_content = fields.Text('Indexed Content', copy=False, readonly=True, prefetch=False)
+
+    # -------------------------------------------------------------------------
+    # Helpers
+    # -------------------------------------------------------------------------
+    @api.model
+    def _get_archive_root(self, root=None):
+        if root is None:
+            root = self.env['ir.config_parameter'].sudo().get_param(ARCHIVE_DIR_PARAM)
+        return root or os.path.join(config['data_dir'], 'documents_archive', self.env.cr.dbname)
+
+    @api.model
+    def _check_archive_root_change(self, value):
+        """Refuse to move the archive store while documents live in it.
+
+        ``archive_path`` is relative to the store, so cold files left in the
+        old directory could no longer be read.
+        """
+        current = self._get_archive_root()
+        if os.path.realpath(self._get_archive_root(value or False)) == os.path.realpath(current):
+            return
+        if self.sudo().with_context(active_test=False).search_count([('storage_tier', '=', 'cold')], limit=1):
+            raise UserError(_(
+                'Documents are archived in %s. Move the directory with its files and change the '
+                'setting afterwards, or restore the archived documents first.'
+            ) % current)
+
+    @api.model
+    def _is_compressible(self, mimetype):
+        mimetype = (mimetype or '').lower()
+        return mimetype in COMPRESSIBLE_MIMETYPES or mimetype.startswith(COMPRESSIBLE_MIMETYPE_PREFIXES)
+
+    def _get_file_attachments(self):
+        """Return {document_id: ir.attachment} for the `file` field of self."""
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', 'in', self.ids),
+            ('res_field', '=', 'file'),
+        ])
+        return {att.res_id: att for att in attachments}
+
+    def _has_content(self):
+        self.ensure_one()
+        if self.storage_tier == 'cold':
+            return bool(self.archive_path)
+        return bool(self.with_context(bin_size=True).file)
+
+    def _get_content_source(self, attachments=None):
+        """Describe where the content lives, as ``(path, compressed, data)``.
+
+        The result needs no database access to be opened, so it can be used
+        after the request cursor is gone (e.g. by streamed responses).
+        ``attachments`` is an optional prefetched ``_get_file_attachments()``.
+        """
+        self.ensure_one()
+        if self.storage_tier == 'cold':
+            path = os.path.join(self._get_archive_root(), self.archive_path or '')
+            if not self.archive_path or not os.path.isfile(path):
+                raise UserError(_('The archived file for "%s" is missing.') % self.name)
+            return path, self.archive_compressed, None
+
+        if attachments is None:
+            attachments = self._get_file_attachments()
+        att = attachments.get(self.id)
+        if att and att.store_fname:
+            return att._full_path(att.store_fname), False, None
+        if att:
+            return None, False, att.raw or b''
+        data = self.with_context(bin_size=False).file
+        return None, False, base64.b64decode(data) if data else b''
+
+    def _get_content_checksum(self):
+        """Return the sha1 of the content (filestore and archive are both keyed by it)."""
+        self.ensure_one()
+        if self.storage_tier == 'cold':
+            return os.path.basename(self.archive_path or '').split('.')[0] or False
+        att = self._get_file_attachments().get(self.id)
+        return att.checksum if att else False
+
+    @api.model
+    def _search_file_metadata(self, domain, limit=None):
+        """Metadata of the matching documents, with the stored size and checksum.
+
+        One query: the access-filtered search is used as a subselect and
+        joined on the file attachments, so nothing binary is read or decoded.
+        """
+        if not self.env.su:
+            domain = expression.AND([domain, self._get_search_access_domain()])
+        query = self._search(domain, limit=limit, order='id')
+        self.env.cr.execute(SQL("""
+            SELECT d.id, d.name, d.file_name, d.mimetype, d.folder_id, d.document_type,
+                   d.create_date, d.write_date, d.storage_tier, d.archive_path,
+                   CASE WHEN d.storage_tier = 'cold' THEN d.archive_size ELSE a.file_size END AS size,
+                   a.checksum
+              FROM custom_document d
+         LEFT JOIN ir_attachment a
+                ON a.res_model = %s AND a.res_field = 'file' AND a.res_id = d.id
+             WHERE d.id IN %s
+          ORDER BY d.id
+        """, self._name, query.subselect()))
+        rows = self.env.cr.dictfetchall()
+        for row in rows:
+            if row['storage_tier'] == 'cold':
+                row['checksum'] = os.path.basename(row['archive_path'] or '').split('.')[0] or None
+            row['size'] = row['size'] or 0
+        return rows
+
+    def _open_content(self):
+        """Return a binary file object on the document content.
+
+        Hot documents are read straight from the filestore; cold ones are
+        decompressed on the fly from the archive store.
+        """
+        return open_content_source(self._get_content_source())
+
+    def _get_file_content(self):
+        """Return the raw bytes of the document, whatever its storage tier."""
+        self.ensure_one()
+        if self.storage_tier != 'cold':
+            data = self.with_context(bin_size=False).file
+            return base64.b64decode(data) if data else b''
+        with self._open_content() as fileobj:
+            return fileobj.read()
+
+    def _get_content_url(self, download=False):
+        self.ensure_one()
+        if self.storage_tier == 'cold':
+            url = f"/documents/content/{self.id}"
+            return f"{url}?download=true" if download else url
+        url = f"/web/content/{self._name}/{self.id}/file/{self.file_name or ''}"
+        return f"{url}?download=true" if download else url
+
+    def _touch_access(self, access_type='open'):
+        """Record a read; throttled and done in SQL so reads stay cheap."""
+        self.env['custom.document.access.log']._record(self, access_type)
+        threshold = fields.Datetime.now() - ACCESS_TOUCH_INTERVAL
+        stale = self.sudo().filtered(lambda d: not d.last_access_date or d.last_access_date < threshold)
+        if stale:
+            self.env.cr.execute("""
+                UPDATE custom_document
+                   SET last_access_date = (now() at time zone 'UTC')
+                 WHERE id IN %s
+            """, (tuple(stale.ids),))
+            stale.invalidate_recordset(['last_access_date'])
+
+    # -------------------------------------------------------------------------
+    # Streamed writes
+    # -------------------------------------------------------------------------
+    @api.model
+    def _write_filestore_stream(self, fileobj, file_name=None, digests=None):
+        """Copy a stream into the filestore, analysing it on the way.
+
+        This single read is the whole upload pipeline: it yields the sha1
+        (filestore key), the sha256, the size, the mimetype sniffed from the
+        first bytes and the beginning of text files for search. Returns a dict
+        with ``store_fname``, ``checksum``, ``sha256``, ``size``, ``mimetype``
+        and ``index_content``; identical content lands on the same file, as
+        with regular attachments.
+
+        ``digests`` is the (sha1, sha256, size) of the stream when the caller
+        has hashed it already: only the head is read if the filestore holds
+        the content, otherwise it is copied and only its sha1 is checked.
+        """
+        Attachment = self.env['ir.attachment'].sudo()
+        root = Attachment._filestore()
+        os.makedirs(root, exist_ok=True)
+        if digests:
+            checksum, sha256_hex, size = digests
+            prefix = bytearray(fileobj.read(INDEX_CONTENT_SIZE))
+            store_fname = os.path.join(checksum[:2], checksum)
+            full_path = Attachment._full_path(store_fname)
+            if not os.path.isfile(full_path):
+                # the file lands under its sha1: check it against what was copied
+                sha1 = hashlib.sha1(prefix)
+                with tempfile.NamedTemporaryFile(dir=root, prefix='upload-', delete=False) as tmp:
+                    try:
+                        tmp.write(prefix)
+                        while chunk := fileobj.read(STREAM_CHUNK_SIZE):
+                            sha1.update(chunk)
+                            tmp.write(chunk)
+                        if sha1.hexdigest() != checksum:
+                            raise UserError(_('"%s" changed while it was being stored.') % (file_name or checksum))
+                    except Exception:
+                        os.unlink(tmp.name)
+                        raise
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(tmp.name, full_path)
+        else:
+            sha1, sha256, size = hashlib.sha1(), hashlib.sha256(), 0
+            prefix = bytearray()
+            with tempfile.NamedTemporaryFile(dir=root, prefix='upload-', delete=False) as tmp:
+                try:
+                    while chunk := fileobj.read(STREAM_CHUNK_SIZE):
+                        sha1.update(chunk)
+                        sha256.update(chunk)
+                        if len(prefix) < INDEX_CONTENT_SIZE:
+                            prefix += chunk[:INDEX_CONTENT_SIZE - len(prefix)]
+                        size += len(chunk)
+                        tmp.write(chunk)
+                except Exception:
+                    os.unlink(tmp.name)
+                    raise
+            checksum, sha256_hex = sha1.hexdigest(), sha256.hexdigest()
+            store_fname = os.path.join(checksum[:2], checksum)
+            full_path = Attachment._full_path(store_fname)
+            if os.path.isfile(full_path):
+                os.unlink(tmp.name)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(tmp.name, full_path)
+        # Left to the filestore GC only if no attachment row gets committed;
+        # marking it now would let the GC race the attachment that uses it
+        self.env.cr.postrollback.add(functools.partial(Attachment._mark_for_gc, store_fname))
+
+        mimetype = sniff_mimetype(bytes(prefix[:SNIFF_SIZE]), file_name)
+        index_content = False
+        if is_indexable(mimetype):
+            index_content = prefix.decode('utf-8', errors='ignore').replace('\x00', '') or False
+        return {
+            'store_fname': store_fname,
+            'checksum': checksum,
+            'sha256': sha256_hex,
+            'size': size,
+            'mimetype': mimetype,
+            'index_content': index_content,
+        }
+
+    @api.model
+    def _get_stored_content_vals(self, stored, mimetype=None):
+        """Document values for stored content; an explicit, specific mimetype wins."""
+        if not mimetype or mimetype in GENERIC_MIMETYPES:
+            mimetype = stored['mimetype']
+        return {
+            'mimetype': mimetype,
+            'content_sha256': stored['sha256'],
+            'index_content': stored['index_content'],
+        }
+
+    def _attach_stored_content(self, stored):
+        """Point the `file` field of self at stored content, replacing the old one."""
+        Attachment = self.env['ir.attachment'].sudo()
+        old = self._get_file_attachments()
+        if old:
+            Attachment.browse([att.id for att in old.values()]).unlink()
+        # create() drops store_fname/checksum/file_size, which it derives from
+        # raw data; the file is already in the filestore, so set them in SQL
+        attachments = Attachment.create([{
+            'name': 'file',
+            'res_model': self._name,
+            'res_field': 'file',
+            'res_id': doc.id,
+            'type': 'binary',
+            'mimetype': stored['mimetype'],
+            'index_content': stored['index_content'],
+        } for doc in self])
+        self.env.cr.execute("""
+            UPDATE ir_attachment
+               SET store_fname = %s, checksum = %s, file_size = %s, db_datas = NULL
+             WHERE id IN %s
+        """, (stored['store_fname'], stored['checksum'], stored['size'], tuple(attachments.ids)))
+        attachments.invalidate_recordset(['store_fname', 'checksum', 'file_size', 'db_datas', 'raw', 'datas'])
+        self.invalidate_recordset(['file', 'file_size'])
+
+    def _set_content_from_stream(self, fileobj, file_name=None, mimetype=None):
+        """Replace the content of the document without loading it in memory."""
+        self.ensure_one()
+        # the editor check runs before anything is touched
+        self._check_editor_bulk()
+        file_name = file_name or self.file_name
+        stored = self._write_filestore_stream(fileobj, file_name)
+        archive_paths = [self.archive_path] if self.archive_path else []
+        self.write(dict(
+            self._get_stored_content_vals(stored, mimetype),
+            file_name=file_name,
+            storage_tier='hot',
+            archive_path=False,
+            archive_compressed=False,
+            archive_size=0,
+        ))
+        self._attach_stored_content(stored)
+        self._unlink_archive_files(archive_paths)
+
+    @api.model
+    def _create_from_stream(self, vals, fileobj, digests=None):
+        """Create a file document whose content is streamed to the filestore.
+
+        ``digests`` is passed on to :meth:`_write_filestore_stream`.
+        """
+        stored = self._write_filestore_stream(fileobj, vals.get('file_name'), digests=digests)
+        vals = dict(vals, document_type='file', **self._get_stored_content_vals(stored, vals.get('mimetype')))
+        doc = self.with_context(document_streamed_upload=True).create(vals).with_env(self.env)
+        doc._attach_stored_content(stored)
+        return doc
+
+    def _read_content_head(self, size=SNIFF_SIZE):
+        """First bytes of the content, or b'' when there is none to read."""
+        self.ensure_one()
+        if not self.id or not self._has_content():
+            return b''
+        try:
+            with self._open_content() as fileobj:
+                return fileobj.read(size)
+        except (OSError, UserError):
+            return b''
+
+    # -------------------------------------------------------------------------
+    # CRUD
+    # -------------------------------------------------------------------------
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Uploaded content goes through the streamed pipeline instead of the
+        # binary field, so it is decoded, hashed and sniffed once
+        stored = {}
+        vals_list = list(vals_list)
+        for index, vals in enumerate(vals_list):
+            if vals.get('file') and vals.get('document_type', 'file') == 'file':
+                vals = vals_list[index] = dict(vals)
+                content = io.BytesIO(base64.b64decode(vals.pop('file')))
+                stored[index] = self._write_filestore_stream(content, vals.get('file_name'))
+                vals.update(self._get_stored_content_vals(stored[index], vals.get('mimetype')))
+        if not stored:
+            return super().create(vals_list)
+        docs = super(CustomDocumentStorage, self.with_context(document_streamed_upload=True)).create(vals_list)
+        docs = docs.with_env(self.env)
+        with_content = docs.browse()
+        for index, content in stored.items():
+            docs[index]._attach_stored_content(content)
+            with_content |= docs[index]
+        (docs - with_content)._check_document_data()
+        return docs
+
+    @api.depends('file', 'storage_tier', 'archive_size')
+    def _compute_file_size(self):
+        """Size recorded on the attachment; only unsaved uploads are decoded."""
+        cold = self.filtered(lambda d: d.storage_tier == 'cold')
+        for doc in cold:
+            doc.file_size = doc.archive_size
+        saved = (self - cold).filtered('id')
+        sizes = {doc_id: att.file_size for doc_id, att in saved._get_file_attachments().items()}
+        for doc in saved:
+            doc.file_size = sizes.get(doc.id, 0)
+        super(CustomDocumentStorage, self - cold - saved)._compute_file_size()
+
+    def _looks_like_pdf(self):
+        self.ensure_one()
+        mimetype = (self.mimetype or '').lower()
+        if 'pdf' in mimetype or (self.file_name or '').lower().endswith('.pdf'):
+            return True
+        # uploads have a sniffed mimetype; only untyped content is looked at
+        if mimetype and mimetype not in GENERIC_MIMETYPES:
+            return False
+        return self._read_content_head(5) == b'%PDF-'
+
+    @api.depends('document_type', 'mimetype', 'file_name', 'file')
+    def _compute_is_pdf(self):
+        for doc in self:
+            doc.is_pdf = doc.document_type == 'file' and doc._looks_like_pdf()
+
+    @api.depends('document_type', 'mimetype', 'file_name', 'file')
+    def _compute_file_kind(self):
+        for doc in self:
+            if doc.document_type == 'url':
+                doc.file_kind = 'url'
+            else:
+                doc.file_kind = 'pdf' if doc._looks_like_pdf() else 'file'
+
+    def write(self, vals):
+        archive_paths = []
+        stored = None
+        if vals.get('file'):
+            # A new upload brings the document back to the hot tier
+            archive_paths = self.filtered('archive_path').mapped('archive_path')
+            vals = dict(vals, storage_tier='hot', archive_path=False, archive_compressed=False, archive_size=0)
+            content = io.BytesIO(base64.b64decode(vals.pop('file')))
+            stored = self._write_filestore_stream(content, vals.get('file_name') or self[:1].file_name)
+            vals.update(self._get_stored_content_vals(stored, vals.get('mimetype')))
+        res = super().write(vals)
+        if stored:
+            self._attach_stored_content(stored)
+        self._unlink_archive_files(archive_paths)
+        return res
+
+    def copy(self, default=None):
+        default = dict(default or {})
+        if self.storage_tier == 'cold' and 'file' not in default:
+            default['file'] = base64.b64encode(self._get_file_content())
+        return super().copy(default)
+
+    def unlink(self):
+        archive_paths = self.sudo().filtered('archive_path').mapped('archive_path')
+        res = super().unlink()
+        self._unlink_archive_files(archive_paths)
+        return res
+
+    @api.model
+    def _unlink_archive_files(self, archive_paths):
+        """Remove archive files no longer referenced by any document."""
+        if not archive_paths:
+            return
+        still_used = set(self.sudo().with_context(active_test=False).search([
+            ('archive_path', 'in', archive_paths),
+        ]).mapped('archive_path'))
+        root = self._get_archive_root()
+        to_remove = set(archive_paths) - still_used
+
+        @self.env.cr.postcommit.add
+        def _remove_archive_files():
+            for rel_path in to_remove:
+                try:
+                    os.remove(os.path.join(root, rel_path))
+                except OSError:
+                    _logger.info("Archive file %s already gone", rel_path)
+
+    # -------------------------------------------------------------------------
+    # Tiering
+    # -------------------------------------------------------------------------
+    @api.model
+    def _get_cold_storage_days(self):
+        param = self.env['ir.config_parameter'].sudo().get_param(
+            'custom_documents.cold_storage_days', COLD_STORAGE_DAYS)
+        try:
+            return int(param)
+        except (TypeError, ValueError):
+            return COLD_STORAGE_DAYS
+
+    def _archive_to_cold_storage(self, attachments):
+        """Move the content of self into the archive store and drop the hot copy."""
+        root = self._get_archive_root()
+        for doc in self:
+            att = attachments.get(doc.id)
+            if not att or not att.checksum:
+                continue
+            compress = self._is_compressible(doc.mimetype or att.mimetype)
+            rel_path = os.path.join(att.checksum[:2], att.checksum + ('.gz' if compress else ''))
+            full_path = os.path.join(root, rel_path)
+            if not os.path.isfile(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                tmp_path = full_path + '.tmp'
+                source = open(att._full_path(att.store_fname), 'rb') if att.store_fname else io.BytesIO(att.raw or b'')
+                with source, (gzip.open(tmp_path, 'wb') if compress else open(tmp_path, 'wb')) as target:
+                    shutil.copyfileobj(source, target)
+                os.replace(tmp_path, full_path)
+            doc.write({
+                'storage_tier': 'cold',
+                'archive_path': rel_path,
+                'archive_compressed': compress,
+                'archive_size': att.file_size,
+                'file': False,
+            })
+
+    @api.model
+    def _cron_move_to_cold_storage(self, batch_size=COLD_STORAGE_BATCH_SIZE, auto_commit=True):
+        """Archive file documents not accessed for N days, in chunks."""
+        days = self._get_cold_storage_days()
+        if days <= 0:
+            return
+        cutoff = fields.Datetime.now() - timedelta(days=days)
+        Doc = self.sudo().with_context(active_test=False)
+        domain = [
+            ('storage_tier', '=', 'hot'),
+            ('document_type', '=', 'file'),
+            '|', ('last_access_date', '<', cutoff),
+                 '&', ('last_access_date', '=', False), ('create_date', '<', cutoff),
+        ]
+        last_id = 0
+        while True:
+            docs = Doc.search(domain + [('id', '>', last_id)], limit=batch_size, order='id')
+            if not docs:
+                break
+            last_id = docs[-1].id
+            docs._archive_to_cold_storage(docs._get_file_attachments())
+            if auto_commit:
+                self.env.cr.commit()
+
+
+class IrConfigParameter(models.Model):
+    _inherit = 'ir.config_parameter'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('key') == ARCHIVE_DIR_PARAM:
+                self.env['custom.document']._check_archive_root_change(vals.get('value'))
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if 'value' in vals or 'key' in vals:
+            for param in self:
+                if ARCHIVE_DIR_PARAM in (param.key, vals.get('key')):
+                    value = vals['value'] if 'value' in vals else param.value
+                    if vals.get('key', param.key) != ARCHIVE_DIR_PARAM:
+                        value = False
+                    self.env['custom.document']._check_archive_root_change(value)
+        return super().write(vals)
+
+    def unlink(self):
+        if any(param.key == ARCHIVE_DIR_PARAM for param in self):
+            self.env['custom.document']._check_archive_root_change(False)
+        return super().unlink()
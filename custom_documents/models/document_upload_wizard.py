@@ -1,6 +1,9 @@
 from odoo import models, fields, api
 import logging
 
+from .document_perf import attachment_payload, instrument
+from .document_storage import open_binary_field
+
 _logger = logging.getLogger(__name__)
 
 class DocumentUploadWizard(models.TransientModel):
@@ -72,6 +75,7 @@ class DocumentUploadWizard(models.TransientModel):
         if self.url and not self.name:
             self.name = self.url.split('/')[-1] or 'URL Document'
 
+    @instrument('upload.document', payload=lambda wizard, result: attachment_payload(wizard, 'file'))
     def action_upload(self):
         self.ensure_one()
 
@@ -83,15 +87,17 @@ class DocumentUploadWizard(models.TransientModel):
             'description': self.description,
         }
 
-        if self.document_type == 'file':
-            vals.update({
-                'file': self.file,
-                'file_name': self.file_name,
-            })
+        Document = self.env['custom.document']
+        fileobj = open_binary_field(self, 'file') if self.document_type == 'file' else None
+        if fileobj:
+            # streamed from the wizard attachment, without a base64 round trip
+            vals['file_name'] = self.file_name
+            with fileobj:
+                doc = Document._create_from_stream(vals, fileobj)
         else:
-            vals['url'] = self.url
-
-        doc = self.env['custom.document'].create(vals)
+            if self.document_type == 'url':
+                vals['url'] = self.url
+            doc = Document.create(vals)
         _logger.info(
             "✓ Created document: %s (ID: %s) in folder: %s",
             doc.name, doc.id, doc.folder_id.name if doc.folder_id else 'None'
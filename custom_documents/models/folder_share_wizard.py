@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 
+from .document_perf import instrument
+
 class CustomFolderShareWizard(models.TransientModel):
     _name = 'custom.folder.share.wizard'
     _description = 'Share Folder Wizard'
@@ -134,6 +136,7 @@ class CustomFolderShareWizard(models.TransientModel):
             wiz.internal_fully_shared = (len(to_add) == 0)
 
     # ---- Actions ----
+    @instrument('share.folder')
     def action_share(self):
         """Create folder share rows for selected partners; keep wizard open."""
         self.ensure_one()
@@ -208,6 +211,7 @@ class CustomFolderShareWizard(models.TransientModel):
             'name': _('Share "%s"') % folder.name,
         }
 
+    @instrument('share.folder_internal')
     def action_share_internal(self):
         """Share with ALL internal users, skip owner/duplicates, keep wizard open."""
         self.ensure_one()
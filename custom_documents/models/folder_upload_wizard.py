@@ -3,11 +3,13 @@ import base64
 import zipfile
 import io
 import os
-import mimetypes
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
 
+from .document_perf import attachment_payload, instrument
+from .document_storage import open_binary_field
+
 _logger = logging.getLogger(__name__)
 
 
@@ -69,35 +71,16 @@ class FolderUploadWizard(models.TransientModel):
         """Get or create a folder by path"""
         if not folder_path or folder_path == '.':
             return parent_folder
-        
-        # Split path into parts
-        parts = folder_path.split('/')
+
+        Folder = self.env['custom.document.folder']
         current_parent = parent_folder or self.parent_folder_id
-        
-        for part in parts:
-            if not part or part == '.':
-                continue
-                
-            # Search for existing folder
-            folder = self.env['custom.document.folder'].search([
-                ('name', '=', part),
-                ('parent_id', '=', current_parent.id if current_parent else False),
-            ], limit=1)
-            
-            if not folder:
-                # Create new folder
-                folder = self.env['custom.document.folder'].create({
-                    'name': part,
-                    'parent_id': current_parent.id if current_parent else False,
-                    'user_id': self.env.user.id,
-                    'company_id': self.env.company.id,
-                })
-                self.folders_created += 1
-                _logger.info(f"Created folder: {part} (parent: {current_parent.name if current_parent else 'Root'})")
-            
-            current_parent = folder
-        
-        return current_parent
+        folder = Folder._resolve_path(folder_path, parent=current_parent, create=False)
+        if not folder:
+            folder, created = Folder._create_path(folder_path, self.env.company, current_parent)
+            self.folders_created += len(created)
+            for new_folder in created:
+                _logger.info(f"Created folder: {new_folder.name} (parent: {new_folder.parent_id.name or 'Root'})")
+        return folder or current_parent
 
     def _check_file_exists(self, filename, folder):
         """Check if file already exists in folder"""
@@ -106,28 +89,22 @@ class FolderUploadWizard(models.TransientModel):
             ('folder_id', '=', folder.id if folder else False),
         ], limit=1)
 
-    def _create_document(self, filename, file_data, folder, subfolder_path=''):
-        """Create a document from file data"""
+    def _create_document(self, filename, fileobj, folder, subfolder_path=''):
+        """Create a document from a file object (hashed and sniffed while stored)"""
         # Check if file exists
         if self.skip_existing and self._check_file_exists(filename, folder):
             self.files_skipped += 1
             _logger.info(f"Skipped existing file: {filename}")
             return None
         
-        # Guess mimetype
-        mimetype, _ = mimetypes.guess_type(filename)
-        
         # Create document
-        doc = self.env['custom.document'].create({
+        doc = self.env['custom.document']._create_from_stream({
             'name': os.path.splitext(filename)[0],  # Remove extension
-            'document_type': 'file',
-            'file': base64.b64encode(file_data),
             'file_name': filename,
-            'mimetype': mimetype or 'application/octet-stream',
             'folder_id': folder.id if folder else False,
             'user_id': self.env.user.id,
             'company_id': self.env.company.id,
-        })
+        }, fileobj)
         
         self.files_uploaded += 1
         _logger.info(f"Uploaded file: {filename} to folder: {folder.name if folder else 'Root'}")
@@ -135,15 +112,14 @@ class FolderUploadWizard(models.TransientModel):
 
     def _process_zip_file(self):
         """Process ZIP file and extract documents"""
-        if not self.zip_file:
+        if not self.with_context(bin_size=True).zip_file:
             raise UserError(_('Please upload a ZIP file.'))
         
         try:
-            # Decode ZIP file
-            zip_data = base64.b64decode(self.zip_file)
-            zip_buffer = io.BytesIO(zip_data)
+            # Read the ZIP straight from its attachment
+            zip_buffer = open_binary_field(self, 'zip_file') or io.BytesIO(base64.b64decode(self.zip_file))
             
-            with zipfile.ZipFile(zip_buffer, 'r') as zip_ref:
+            with zip_buffer, zipfile.ZipFile(zip_buffer, 'r') as zip_ref:
                 # Get all files in ZIP
                 file_list = zip_ref.namelist()
                 _logger.info(f"Processing ZIP with {len(file_list)} items")
@@ -172,11 +148,9 @@ class FolderUploadWizard(models.TransientModel):
                     if self.create_subfolders and folder_path:
                         target_folder = self._get_or_create_folder(folder_path, self.parent_folder_id)
                     
-                    # Read file data
-                    file_data = zip_ref.read(file_path)
-                    
-                    # Create document
-                    self._create_document(filename, file_data, target_folder, folder_path)
+                    # Create document, streaming the member out of the archive
+                    with zip_ref.open(file_path) as member:
+                        self._create_document(filename, member, target_folder, folder_path)
                         
         except zipfile.BadZipFile:
             raise UserError(_('Invalid ZIP file. Please upload a valid ZIP archive.'))
@@ -192,20 +166,21 @@ class FolderUploadWizard(models.TransientModel):
             raise UserError(_('Please upload at least one file.'))
         
         for file_line in self.file_ids:
-            if not file_line.file or not file_line.filename:
+            if not file_line.with_context(bin_size=True).file or not file_line.filename:
                 continue
             
-            # Decode file
-            file_data = base64.b64decode(file_line.file)
-            
             # Determine target folder
             target_folder = self.parent_folder_id
             if self.create_subfolders and file_line.folder_path:
                 target_folder = self._get_or_create_folder(file_line.folder_path, self.parent_folder_id)
             
-            # Create document
-            self._create_document(file_line.filename, file_data, target_folder)
+            # Create document, streamed from the line attachment
+            fileobj = open_binary_field(file_line, 'file') or io.BytesIO(base64.b64decode(file_line.file))
+            with fileobj:
+                self._create_document(file_line.filename, fileobj, target_folder)
 
+    @instrument('upload.folder', payload=lambda wizard, result: (
+        attachment_payload(wizard, 'zip_file') + attachment_payload(wizard.file_ids, 'file')))
     def action_upload(self):
         """Process upload based on selected method"""
         self.ensure_one()
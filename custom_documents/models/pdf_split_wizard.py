@@ -0,0 +1,53 @@
+from odoo import api, models, fields, _
+from odoo.exceptions import UserError
+
+from .document_pdf import parse_page_ranges
+
+
+class CustomDocumentPdfSplitWizard(models.TransientModel):
+    _name = 'custom.document.pdf.split.wizard'
+    _description = 'Split PDF Wizard'
+
+    document_id = fields.Many2one('custom.document', required=True, readonly=True)
+    page_count = fields.Integer('Pages', readonly=True)
+    mode = fields.Selection([
+        ('pages', 'One document per page'),
+        ('every', 'Every N pages'),
+        ('ranges', 'Extract page ranges'),
+    ], string='Split', required=True, default='ranges')
+    pages_per_file = fields.Integer('Pages per document', default=1)
+    page_ranges = fields.Char('Page ranges', help='e.g. "1-3, 5, 8-" (one document per range)')
+    folder_id = fields.Many2one('custom.document.folder', string='Destination Folder')
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        doc_id = res.get('document_id') or self.env.context.get('active_id')
+        if doc_id:
+            doc = self.env['custom.document'].browse(doc_id)
+            res['document_id'] = doc.id
+            res.setdefault('folder_id', doc.folder_id.id)
+            res['page_count'] = doc._get_pdf_page_count()
+        return res
+
+    def _get_ranges(self):
+        self.ensure_one()
+        count = self.page_count
+        if self.mode == 'ranges':
+            return parse_page_ranges(self.page_ranges, count)
+        step = 1 if self.mode == 'pages' else self.pages_per_file
+        if step < 1:
+            raise UserError(_("Pages per document must be at least 1."))
+        return [(first, min(first + step - 1, count)) for first in range(1, count + 1, step)]
+
+    def action_apply(self):
+        self.ensure_one()
+        new_docs = self.document_id._split_pdf(self._get_ranges(), folder=self.folder_id)
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Split Documents'),
+            'res_model': 'custom.document',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', new_docs.ids)],
+            'target': 'current',
+        }
@@ -1,3 +1,4 @@
+import base64
 from odoo import models, fields, _, api
 from odoo.exceptions import UserError
 
@@ -49,7 +50,7 @@ class CustomDocumentPreviewWizard(models.TransientModel):
         vals = {
             'name': (d.name or '') + ' (copy)',
             'document_type': d.document_type,
-            'file': d.with_context(bin_size=False).file,
+            'file': base64.b64encode(d._get_file_content()) if d.document_type == 'file' else False,
             'file_name': d.file_name,
             'mimetype': d.mimetype,
             'url': d.url,
@@ -138,7 +139,10 @@ class CustomDocumentPreviewWizard(models.TransientModel):
         raise UserError(_("Links:\nViewer: %s\nDownload: %s") % (base, base + "?download=true"))
 
     def action_split_pdf_menu(self):
-        raise UserError(_("Split PDF: not implemented yet."))
+        self.ensure_one()
+        if not self.document_id:
+            raise UserError(_("No document found."))
+        return self.document_id.action_split_pdf()
 
     def action_sign_menu(self):
         raise UserError(_("Sign: integrate with Sign app if installed."))
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, _
+
+from .document_perf import reset_samples
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = 'res.config.settings'
+
+    documents_trash_retention_days = fields.Integer(
+        string='Trash Retention (days)',
+        default=30,
+        config_parameter='custom_documents.trash_retention_days',
+        help='Trashed documents older than this are permanently deleted. Set to 0 to keep them forever.'
+    )
+
+    documents_cold_storage_days = fields.Integer(
+        string='Archive After (days)',
+        default=365,
+        config_parameter='custom_documents.cold_storage_days',
+        help='Files not accessed for this many days are moved to the compressed archive store. Set to 0 to disable.'
+    )
+    documents_archive_dir = fields.Char(
+        string='Archive Directory',
+        config_parameter='custom_documents.archive_dir',
+        help='Local directory of the archive store. Defaults to <data_dir>/documents_archive/<database>.'
+    )
+    documents_import_root = fields.Char(
+        string='Import Root Directory',
+        config_parameter='custom_documents.import_root',
+        help='Server directory imports are only allowed below this path. Leave empty to allow any path.'
+    )
+    documents_derivative_cache_mb = fields.Integer(
+        string='Image Preview Cache (MB)',
+        default=1024,
+        config_parameter='custom_documents.derivative_cache_mb',
+        help='Disk space for resized image variants; the least recently used are evicted beyond it.'
+    )
+
+    documents_signed_url_ttl_hours = fields.Integer(
+        string='Signed URL Lifetime (hours)',
+        default=24,
+        config_parameter='custom_documents.signed_url_ttl_hours',
+        help='How long public download URLs stay valid. Proxies may cache them until they expire.'
+    )
+
+    documents_perf_instrumentation = fields.Boolean(
+        string='Performance Instrumentation',
+        config_parameter='custom_documents.perf_instrumentation',
+        help='Record query counts and timings of document downloads, uploads and shares.'
+    )
+
+    def action_rotate_url_signing_key(self):
+        self.env['custom.document']._rotate_url_signing_key()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Signing key rotated'),
+                'message': _('All previously issued download URLs are now invalid.'),
+                'type': 'success',
+                'sticky': False,
+            },
+        }
+
+    def action_view_document_perf_stats(self):
+        return self.env['custom.document.perf.stat'].action_open_report()
+
+    def action_reset_document_perf_stats(self):
+        reset_samples(self.env.cr.dbname)
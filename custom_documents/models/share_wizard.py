@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 
+from .document_perf import instrument
+
 class CustomDocumentShareWizard(models.TransientModel):
     _name = 'custom.document.share.wizard'
     _description = 'Share Document Wizard'
@@ -93,6 +95,7 @@ class CustomDocumentShareWizard(models.TransientModel):
         return res
 
     # ---- Actions ----
+    @instrument('share.wizard')
     def action_share(self):
         """Create share lines for selected partners and keep the wizard open."""
         self.ensure_one()
@@ -170,6 +173,7 @@ class CustomDocumentShareWizard(models.TransientModel):
             w.internal_fully_shared = (len(to_add) == 0)
 
     
+    @instrument('share.document_internal')
     def action_share_internal(self):
         """Share with ALL internal users, skip owner/duplicates, keep wizard open."""
         self.ensure_one()
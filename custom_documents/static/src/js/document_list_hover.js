@@ -3,6 +3,10 @@ import { ListRenderer } from "@web/views/list/list_renderer";
 import { patch } from "@web/core/utils/patch";
 import { useService } from "@web/core/utils/hooks";
 
+// Row metadata is fetched once per page and kept for a short while, so
+// hovering and clicking the row actions need no server round-trip.
+const METADATA_TTL = 60 * 1000;
+
 /**
  * Add hover action buttons (Share, Download, Info) to document list rows
  */
@@ -12,14 +16,41 @@ patch(ListRenderer.prototype, {
         this.orm = useService("orm");
         this.action = useService("action");
         this.notification = useService("notification");
+        this.documentMetadata = new Map();
+    },
+
+    /**
+     * Fetch the metadata of the visible rows that are not cached yet (one call)
+     */
+    async _loadDocumentMetadata() {
+        const now = Date.now();
+        const missing = this.props.list.records
+            .map((record) => record.resId)
+            .filter((id) => {
+                const cached = this.documentMetadata.get(id);
+                return id && (!cached || now - cached.fetchedAt > METADATA_TTL);
+            });
+        if (!missing.length) {
+            return;
+        }
+        const result = await this.orm.call("custom.document", "get_hover_metadata", [missing]);
+        for (const id of missing) {
+            const data = result[id] || result[String(id)];
+            if (data) {
+                this.documentMetadata.set(id, { ...data, fetchedAt: now });
+            } else {
+                this.documentMetadata.delete(id);
+            }
+        }
     },
 
     /**
      * Add hover buttons after rendering
      */
-    onMounted() {
+    async onMounted() {
         super.onMounted(...arguments);
         if (this.props.list?.resModel === 'custom.document') {
+            await this._loadDocumentMetadata();
             this._addDocumentHoverButtons();
         }
     },
@@ -30,6 +61,7 @@ patch(ListRenderer.prototype, {
     async onPatched() {
         await super.onPatched(...arguments);
         if (this.props.list?.resModel === 'custom.document') {
+            await this._loadDocumentMetadata();
             this._addDocumentHoverButtons();
         }
     },
@@ -55,28 +87,33 @@ patch(ListRenderer.prototype, {
             if (!record) return;
 
             const docId = record.resId;
+            const meta = this.documentMetadata.get(docId);
+            if (!meta) return;
 
             // Create actions container
             const actionsDiv = document.createElement('div');
             actionsDiv.className = 'o_document_hover_actions';
             
             // Share button
-            const shareBtn = this._createActionButton('fa-share-alt', 'Share', () => {
-                this._onShareDocument(docId);
-            });
+            if (meta.can_share) {
+                const shareBtn = this._createActionButton('fa-share-alt', 'Share', () => {
+                    this._onShareDocument(docId);
+                });
+                actionsDiv.appendChild(shareBtn);
+            }
             
             // Download button
-            const downloadBtn = this._createActionButton('fa-download', 'Download', () => {
-                this._onDownloadDocument(docId);
-            });
+            if (meta.download_url) {
+                const downloadBtn = this._createActionButton('fa-download', 'Download', () => {
+                    this._onDownloadDocument(docId);
+                });
+                actionsDiv.appendChild(downloadBtn);
+            }
             
             // Info button
             const infoBtn = this._createActionButton('fa-info-circle', 'Info & Tags', () => {
                 this._onInfoDocument(docId);
             });
-
-            actionsDiv.appendChild(shareBtn);
-            actionsDiv.appendChild(downloadBtn);
             actionsDiv.appendChild(infoBtn);
 
             // Insert at the end of the row
@@ -110,14 +147,8 @@ patch(ListRenderer.prototype, {
      */
     async _onShareDocument(docId) {
         try {
-            const result = await this.orm.call(
-                'custom.document',
-                'action_menu_share',
-                [[docId]]
-            );
-            if (result) {
-                await this.action.doAction(result);
-            }
+            const action = await this.orm.call("custom.document", "action_menu_share", [[docId]]);
+            await this.action.doAction(action);
         } catch (error) {
             console.error('Share error:', error);
             this.notification.add('Could not open share dialog', { type: 'danger' });
@@ -127,19 +158,12 @@ patch(ListRenderer.prototype, {
     /**
      * Handle Download action
      */
-    async _onDownloadDocument(docId) {
-        try {
-            const result = await this.orm.call(
-                'custom.document',
-                'action_menu_download',
-                [[docId]]
-            );
-            if (result && result.type === 'ir.actions.act_url') {
-                window.location.href = result.url;
-            }
-        } catch (error) {
-            console.error('Download error:', error);
-            this.notification.add('Could not download document', { type: 'danger' });
+    _onDownloadDocument(docId) {
+        const meta = this.documentMetadata.get(docId);
+        if (meta.document_type === 'url') {
+            window.open(meta.download_url, '_blank');
+        } else {
+            window.location.href = meta.download_url;
         }
     },
 
@@ -148,19 +172,14 @@ patch(ListRenderer.prototype, {
      */
     async _onInfoDocument(docId) {
         try {
-            const result = await this.orm.call(
-                'custom.document',
-                'action_menu_info_tags',
-                [[docId]]
-            );
-            if (result) {
-                await this.action.doAction(result);
-            }
+            const action = await this.orm.call("custom.document", "action_menu_info_tags", [[docId]]);
+            await this.action.doAction(action, {
+                // Info & tags may change the row; drop it from the cache
+                onClose: () => this.documentMetadata.delete(docId),
+            });
         } catch (error) {
             console.error('Info error:', error);
             this.notification.add('Could not open info dialog', { type: 'danger' });
         }
     },
 });
-
-console.log("✓ Document list hover actions registered");
\ No newline at end of file
@@ -38,13 +38,7 @@ export class SelectionButtons extends Component {
         const selectedIds = [...this.env.model.selection];
         console.log("Download documents:", selectedIds);
         
-        if (selectedIds.length !== 1) {
-            this.notification.add(_t("Please select exactly one document."), { 
-                type: "warning",
-                sticky: false,
-            });
-            return;
-        }
+        // Several documents are downloaded as one streamed ZIP archive
         
         try {
             const result = await this.orm.call(
@@ -44,9 +44,13 @@ class CustomDocumentEquipmentBridge(models.Model):
             return docs
 
         # Auto-link to equipment after creation based on folder
+        equipment_by_folder = {}
         for doc in docs:
             if not doc.equipment_id and doc.folder_id:
-                eid = doc._find_equipment_from_folder(doc.folder_id.id)
+                folder_id = doc.folder_id.id
+                if folder_id not in equipment_by_folder:
+                    equipment_by_folder[folder_id] = doc._find_equipment_from_folder(folder_id)
+                eid = equipment_by_folder[folder_id]
                 if eid:
                     doc.with_context(skip_equipment_autolink=True).write({'equipment_id': eid})
         return docs
@@ -59,11 +63,12 @@ class CustomDocumentEquipmentBridge(models.Model):
 
         # If folder changed and equipment_id wasn't explicitly given, recompute link
         if 'folder_id' in vals and 'equipment_id' not in vals:
-            for doc in self:
-                if doc.folder_id:
-                    eid = doc._find_equipment_from_folder(doc.folder_id.id)
-                    if eid and doc.equipment_id.id != eid:
-                        doc.with_context(skip_equipment_autolink=True).write({'equipment_id': eid})
+            # Bulk moves target one folder: resolve the equipment once per folder
+            for folder, docs in self.filtered('folder_id').grouped('folder_id').items():
+                eid = self._find_equipment_from_folder(folder.id)
+                docs = docs.filtered(lambda d: d.equipment_id.id != eid)
+                if eid and docs:
+                    docs.with_context(skip_equipment_autolink=True).write({'equipment_id': eid})
         return res
 
 
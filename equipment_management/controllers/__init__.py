@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import scanner_controller
+from . import availability_controller
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+
+class EquipmentAvailabilityController(http.Controller):
+
+    @http.route('/equipment/availability', type='json', auth='user')
+    def availability(self, date_from, date_to, category_id=None, location_id=None, min_hours=0):
+        """Busy intervals and free slots of a category and/or location subtree.
+
+        One payload for a whole calendar: every item of the subtree with its
+        loans, approved reservations and maintenance in the window, and the
+        free slots of at least ``min_hours`` between them.
+        """
+        return request.env['equipment.booking']._get_availability(
+            date_from, date_to, category_id=category_id, location_id=location_id, min_hours=min_hours)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+MAX_LOOKUP_BARCODES = 200
+MAX_SUBMIT_SCANS = 500
+
+
+class EquipmentScannerController(http.Controller):
+
+    @http.route('/equipment/scan/lookup', type='json', auth='user')
+    def lookup(self, barcodes):
+        """Resolve one or many scanned barcodes to a compact status payload.
+
+        Barcodes are matched from a cached barcode -> id map, so a scan costs
+        one small read of the matched items rather than a search.
+        """
+        if isinstance(barcodes, str):
+            barcodes = [barcodes]
+        barcodes = list(dict.fromkeys(
+            code.strip() for code in barcodes[:MAX_LOOKUP_BARCODES] if isinstance(code, str) and code.strip()))
+        found = request.env['equipment.item']._lookup_barcodes(barcodes)
+        items = request.env['equipment.item'].browse([item.id for item in found.values()])
+        payload = {row['id']: row for row in items._get_scan_payload()}
+        return {
+            'items': {barcode: payload[item.id] for barcode, item in found.items()},
+            'unknown': [barcode for barcode in barcodes if barcode not in found],
+        }
+
+    @http.route('/equipment/scan/submit', type='json', auth='user')
+    def submit(self, scans, purpose=None, return_location_id=None):
+        """Check out / check in a queue of scans in one transaction.
+
+        Returns one result per scan (``done``, ``pending`` approval,
+        ``duplicate`` of an already processed scan, or ``error``), in order.
+        """
+        scans = [scan for scan in scans[:MAX_SUBMIT_SCANS] if isinstance(scan, dict)]
+        results = request.env['equipment.item']._process_scan_batch(
+            scans, purpose=purpose, return_location_id=return_location_id)
+        return {'results': results}
@@ -6,4 +6,5 @@ from . import equipment_location
 from . import equipment_assignment  
 from . import equipment_item
 from . import equipment_loan
-from . import equipment_maintenance
\ No newline at end of file
+from . import equipment_maintenance
+from . import equipment_booking
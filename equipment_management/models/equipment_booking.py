@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+from datetime import timedelta
+
+from .equipment_loan import LOAN_BOOKING_STATES, OVERDUE_HOLD
+from .equipment_maintenance import RESERVATION_BOOKING_STATES
+
+# Datetimes are stored as naive UTC, so tsrange has tstzrange semantics.
+# Same expression as the exclusion constraint: its GiST index serves the lookups.
+PERIOD = "tsrange(date_from, date_to, '[)')"
+# Scheduled maintenance takes its day; work in progress holds the item until completed
+MAINTENANCE_PERIOD = """tsrange(m.scheduled_date::timestamp,
+                            CASE WHEN m.state = 'scheduled' THEN (m.scheduled_date + 1)::timestamp END, '[)')"""
+MAINTENANCE_BUSY_STATES = ('scheduled', 'in_progress')
+MAX_AVAILABILITY_ITEMS = 2000
+MAX_AVAILABILITY_DAYS = 366
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) pairs, sorted by start."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(interval) for interval in merged]
+
+
+def free_slots(busy, window_start, window_end, min_length=None):
+    """Gaps of at least ``min_length`` between the ``busy`` intervals, within the window."""
+    slots, cursor = [], window_start
+    for start, end in merge_intervals(busy):
+        if start > cursor:
+            slots.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        slots.append((cursor, window_end))
+    if min_length:
+        slots = [(start, end) for start, end in slots if end - start >= min_length]
+    return slots
+
+
+class EquipmentBooking(models.Model):
+    """Period an item is held by an approved loan or reservation.
+
+    Kept in sync by loans and reservations. The exclusion constraint on
+    (equipment, period) rules out double bookings, even between concurrent
+    transactions, and its GiST index answers the availability queries.
+    """
+    _name = 'equipment.booking'
+    _description = 'Equipment Booking'
+    _order = 'date_from, id'
+
+    equipment_id = fields.Many2one('equipment.item', string='Equipment', required=True, ondelete='cascade')
+    date_from = fields.Datetime(string='From', required=True)
+    date_to = fields.Datetime(string='To', required=True)
+    loan_id = fields.Many2one('equipment.loan', string='Loan', ondelete='cascade', index='btree_not_null')
+    reservation_id = fields.Many2one('equipment.reservation', string='Reservation',
+                                     ondelete='cascade', index='btree_not_null')
+
+    _sql_constraints = [
+        ('check_dates', 'CHECK(date_to >= date_from)',
+         'The end of a booking must be after its start!'),
+        ('check_source', 'CHECK(num_nonnulls(loan_id, reservation_id) = 1)',
+         'A booking belongs to exactly one loan or reservation.'),
+        ('no_overlap', "EXCLUDE USING gist (equipment_id WITH =, %s WITH &&)" % PERIOD,
+         'This equipment is already booked for an overlapping period.'),
+    ]
+
+    def _auto_init(self):
+        # the integer part of the exclusion constraint needs a GiST operator class
+        self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        return super()._auto_init()
+
+    def init(self):
+        # First install: book the loans and reservations already approved.
+        # Existing double bookings cannot be fixed here; the later ones are skipped.
+        self.env.cr.execute("SELECT 1 FROM equipment_booking LIMIT 1")
+        if self.env.cr.fetchone():
+            return
+        self.env.cr.execute("""
+            INSERT INTO equipment_booking (equipment_id, date_from, date_to, loan_id,
+                                           create_uid, create_date, write_uid, write_date)
+            SELECT equipment_id, borrow_date,
+                   -- still out after the due date: held as _sync_bookings() does
+                   CASE WHEN state IN ('issued', 'overdue') AND due_date < now() at time zone 'UTC'
+                        THEN (now() at time zone 'UTC') + %(overdue_hold)s
+                        ELSE due_date END,
+                   id, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM equipment_loan
+             WHERE state IN %(loan_states)s AND due_date >= borrow_date
+             ORDER BY borrow_date, id
+            ON CONFLICT DO NOTHING
+        """, {'uid': self.env.uid, 'loan_states': LOAN_BOOKING_STATES, 'overdue_hold': OVERDUE_HOLD})
+        self.env.cr.execute("""
+            INSERT INTO equipment_booking (equipment_id, date_from, date_to, reservation_id,
+                                           create_uid, create_date, write_uid, write_date)
+            SELECT rel.equipment_id, res.from_date, res.to_date, res.id,
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM equipment_reservation res
+              JOIN equipment_reservation_rel rel ON rel.reservation_id = res.id
+             WHERE res.state IN %(reservation_states)s AND res.to_date >= res.from_date
+             ORDER BY res.from_date, res.id
+            ON CONFLICT DO NOTHING
+        """, {'uid': self.env.uid, 'reservation_states': RESERVATION_BOOKING_STATES})
+
+    # ---------- Queries ----------
+    @api.model
+    def _get_free_equipment_ids(self, equipment_ids, date_from, date_to):
+        """Return the ids among ``equipment_ids`` with no booking overlapping [date_from, date_to).
+
+        One query, an index probe per item on the exclusion constraint.
+        """
+        if not equipment_ids:
+            return []
+        self.flush_model(['equipment_id', 'date_from', 'date_to'])
+        self.env.cr.execute("""
+            SELECT item.id
+              FROM unnest(%%s::int[]) AS item(id)
+             WHERE NOT EXISTS (
+                    SELECT 1
+                      FROM equipment_booking
+                     WHERE equipment_id = item.id
+                       AND %s && tsrange(%%s::timestamp, %%s::timestamp, '[)')
+             )
+        """ % PERIOD, (list(equipment_ids), date_from, date_to))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _get_conflicts(self, equipment_ids, date_from, date_to):
+        """Bookings of ``equipment_ids`` that overlap [date_from, date_to)."""
+        if not equipment_ids:
+            return self.browse()
+        self.flush_model(['equipment_id', 'date_from', 'date_to'])
+        self.env.cr.execute("""
+            SELECT id
+              FROM equipment_booking
+             WHERE equipment_id = ANY(%%s)
+               AND %s && tsrange(%%s::timestamp, %%s::timestamp, '[)')
+             ORDER BY date_from, id
+        """ % PERIOD, (list(equipment_ids), date_from, date_to))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _get_busy_intervals(self, equipment_ids, date_from, date_to):
+        """Return {item id: ((start, end, kind, reference), ...)} clipped to the window.
+
+        Loans, reservations and maintenance in one range query, served by
+        the GiST index of the exclusion constraint.
+        """
+        self.flush_model()
+        self.env['equipment.maintenance'].flush_model(['equipment_id', 'scheduled_date', 'state', 'name'])
+        self.env.cr.execute("""
+            SELECT b.equipment_id, GREATEST(b.date_from, %%(start)s), LEAST(b.date_to, %%(end)s),
+                   CASE WHEN b.loan_id IS NOT NULL THEN 'loan' ELSE 'reservation' END,
+                   COALESCE(l.name, r.name)
+              FROM equipment_booking b
+              LEFT JOIN equipment_loan l ON l.id = b.loan_id
+              LEFT JOIN equipment_reservation r ON r.id = b.reservation_id
+             WHERE b.equipment_id = ANY(%%(ids)s)
+               AND %s && tsrange(%%(start)s, %%(end)s, '[)')
+            UNION ALL
+            SELECT m.equipment_id, GREATEST(lower(p.period), %%(start)s),
+                   LEAST(COALESCE(upper(p.period), %%(end)s), %%(end)s),
+                   'maintenance', m.name
+              FROM equipment_maintenance m
+             CROSS JOIN LATERAL (SELECT %s AS period) p
+             WHERE m.equipment_id = ANY(%%(ids)s)
+               AND m.state IN %%(maintenance_states)s
+               AND p.period && tsrange(%%(start)s, %%(end)s, '[)')
+             ORDER BY 1, 2
+        """ % (PERIOD, MAINTENANCE_PERIOD), {
+            'ids': list(equipment_ids),
+            'start': date_from,
+            'end': date_to,
+            'maintenance_states': MAINTENANCE_BUSY_STATES,
+        })
+        busy = {}
+        for equipment_id, start, end, kind, reference in self.env.cr.fetchall():
+            busy.setdefault(equipment_id, []).append((start, end, kind, reference))
+        return {equipment_id: tuple(intervals) for equipment_id, intervals in busy.items()}
+
+    @api.model
+    def _get_availability(self, date_from, date_to, category_id=False, location_id=False, min_hours=0):
+        """Busy intervals and free slots of the items of a category and/or location subtree.
+
+        Busy intervals come from loans, approved reservations and maintenance;
+        free slots are the gaps of at least ``min_hours`` within the window.
+        """
+        try:
+            start = fields.Datetime.to_datetime(date_from)
+            end = fields.Datetime.to_datetime(date_to)
+        except ValueError:
+            raise UserError(_('Invalid availability window.'))
+        if not start or not end or end <= start:
+            raise UserError(_('The end of the window must be after its start.'))
+        if end - start > timedelta(days=MAX_AVAILABILITY_DAYS):
+            raise UserError(_('The window cannot exceed %s days.') % MAX_AVAILABILITY_DAYS)
+        try:
+            min_hours = float(min_hours or 0)
+        except (TypeError, ValueError):
+            raise UserError(_('The minimum slot length must be a number of hours.'))
+        if not 0 <= min_hours <= MAX_AVAILABILITY_DAYS * 24:
+            raise UserError(_('The minimum slot length must be between 0 and %s hours.') % (MAX_AVAILABILITY_DAYS * 24))
+
+        domain = []
+        if category_id:
+            domain.append(('category_id', 'child_of', int(category_id)))
+        if location_id:
+            domain.append(('location_id', 'child_of', int(location_id)))
+        Item = self.env['equipment.item']
+        # one extra row tells whether the list was cut
+        items = Item.search_read(domain, ['name', 'barcode', 'state', 'category_id', 'location_id'],
+                                 limit=MAX_AVAILABILITY_ITEMS + 1)
+        truncated = len(items) > MAX_AVAILABILITY_ITEMS
+        items = items[:MAX_AVAILABILITY_ITEMS]
+        busy = self._get_busy_intervals([item['id'] for item in items], start, end) if items else {}
+        min_length = timedelta(hours=min_hours) if min_hours else None
+        to_string = fields.Datetime.to_string
+
+        state_labels = dict(Item._fields['state']._description_selection(self.env))
+        result = []
+        for item in items:
+            intervals = busy.get(item['id'], ())
+            slots = free_slots([(s, e) for s, e, _kind, _ref in intervals], start, end, min_length)
+            result.append({
+                'id': item['id'],
+                'name': item['name'],
+                'barcode': item['barcode'],
+                'state': item['state'],
+                'state_label': state_labels.get(item['state'], item['state']),
+                'category': item['category_id'] and item['category_id'][1],
+                'location': item['location_id'] and item['location_id'][1],
+                'busy': [{'start': to_string(s), 'end': to_string(e), 'kind': kind, 'reference': ref}
+                         for s, e, kind, ref in intervals],
+                'free': [{'start': to_string(s), 'end': to_string(e)} for s, e in slots],
+                'free_hours': round(sum((e - s).total_seconds() for s, e in slots) / 3600, 2),
+            })
+        return {
+            'date_from': to_string(start),
+            'date_to': to_string(end),
+            'truncated': truncated,
+            'items': result,
+        }
+
+    # ---------- Synchronisation ----------
+    @api.model
+    def _replace_bookings(self, field_name, records, vals_list):
+        """Replace the bookings of ``records`` (loans or reservations) by ``vals_list``.
+
+        Conflicts are reported with the booking that holds the item; the
+        exclusion constraint still catches concurrent transactions.
+        """
+        Booking = self.sudo()
+        Booking.search([(field_name, 'in', records.ids)]).unlink()
+        for vals in vals_list:
+            conflicts = Booking._get_conflicts([vals['equipment_id']], vals['date_from'], vals['date_to'])
+            if conflicts:
+                conflict = conflicts[0]
+                raise ValidationError(_(
+                    'Equipment "%(equipment)s" is already booked for the requested period.\n'
+                    'Conflicting booking: %(source)s (%(start)s - %(end)s)'
+                ) % {
+                    'equipment': conflict.equipment_id.display_name,
+                    'source': (conflict.loan_id or conflict.reservation_id).display_name,
+                    'start': fields.Datetime.to_string(conflict.date_from),
+                    'end': fields.Datetime.to_string(conflict.date_to),
+                })
+            Booking.create(vals)
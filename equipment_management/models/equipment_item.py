@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError, UserError
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import AccessError, ValidationError, UserError
+from datetime import timedelta
 import base64
 import io
 
@@ -10,6 +11,36 @@ try:
 except ImportError:
     qrcode = None
 
+BARCODE_ALLOCATION_ATTEMPTS = 10
+EQUIPMENT_SUBFOLDERS = ['Purchase Documents', 'Warranty & Certificates']
+FOLDER_BATCH_SIZE = 500
+# When set, create() leaves the folders to the provisioning cron
+DEFER_FOLDERS_PARAM = 'equipment_management.defer_folder_provisioning'
+# Bumped by the changes that affect barcodes; part of the barcode map cache key
+BARCODE_GENERATION_PARAM = 'equipment_management.barcode_map_generation'
+
+
+def render_qr_png(barcode):
+    """Return (barcode, base64 PNG or False)."""
+    try:
+        qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
+        qr.add_data(barcode)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        return barcode, base64.b64encode(buffer.getvalue())
+    except Exception:
+        return barcode, False
+
+
+def render_qr_codes(barcodes):
+    """Return {barcode: base64 PNG}, rendered once per distinct barcode."""
+    barcodes = sorted(set(barcodes))
+    if not qrcode or not barcodes:
+        return {}
+    return dict(map(render_qr_png, barcodes))
+
 
 class EquipmentItem(models.Model):
     _name = 'equipment.item'
@@ -112,6 +143,10 @@ class EquipmentItem(models.Model):
         copy=False,
         readonly=True
     )
+    folder_provisioning_pending = fields.Boolean(
+        string='Folder Provisioning Pending', copy=False, readonly=True, index=True,
+        help='Set when the folders were left to the provisioning cron'
+    )
     
     # document_ids = fields.One2many(
     #     'custom.document',
@@ -125,7 +160,8 @@ class EquipmentItem(models.Model):
     )
 
     # ------------- Media / Relations -------------
-    qr_code_image = fields.Binary(string='QR Code', compute='_compute_qr_code_image', store=False, attachment=False)
+    # Stored as an attachment: rendered when the barcode changes, not on every read
+    qr_code_image = fields.Binary(string='QR Code', compute='_compute_qr_code_image', store=True, attachment=True)
     loan_ids = fields.One2many('equipment.loan', 'equipment_id', string='Loan History')
     maintenance_ids = fields.One2many('equipment.maintenance', 'equipment_id', string='Maintenance Records')
     reservation_ids = fields.Many2many(
@@ -168,120 +204,349 @@ class EquipmentItem(models.Model):
     @api.model
     def _ensure_equipment_root_folder(self, company):
         """Ensure Equipment root folder exists under Company root"""
-        FolderModel = self.env['custom.document.folder']
-        company_root = FolderModel._get_company_root(company)
-        
-        equipment_root = FolderModel.sudo().search([
-            ('name', '=', 'Equipment'),
-            ('parent_id', '=', company_root.id),
-            ('company_id', '=', company.id),
-        ], limit=1)
-        
-        if not equipment_root:
-            equipment_root = FolderModel.sudo().create({
-                'name': 'Equipment',
-                'parent_id': company_root.id,
-                'company_id': company.id,
-                'user_id': self.env.user.id,
-                'sequence': 15,
-            })
-        
-        return equipment_root
+        return self.env['custom.document.folder'].sudo()._resolve_path(
+            'Company/Equipment', company=company, vals={'sequence': 15})
 
     def _ensure_category_folder(self, category, equipment_root):
         """Ensure category folder exists under Equipment root"""
-        FolderModel = self.env['custom.document.folder']
-        
-        category_folder = FolderModel.sudo().search([
-            ('name', '=', category.name),
-            ('parent_id', '=', equipment_root.id),
-            ('company_id', '=', self.company_id.id),
-        ], limit=1)
-        
-        if not category_folder:
-            category_folder = FolderModel.sudo().create({
-                'name': category.name,
-                'parent_id': equipment_root.id,
-                'company_id': self.company_id.id,
-                'user_id': self.env.user.id,
-            })
-        
-        return category_folder
+        return self.env['custom.document.folder'].sudo()._resolve_path(
+            [category.name], company=self.company_id, parent=equipment_root)
+
+    def _get_folder_name(self):
+        self.ensure_one()
+        return f"{self.name} ({self.barcode or self.serial_number or self.id})"
 
     def _create_equipment_folder(self):
         """Create dedicated folder for this equipment item"""
         self.ensure_one()
-        
-        if self.equipment_folder_id:
-            return self.equipment_folder_id
-        
-        FolderModel = self.env['custom.document.folder']
-        
-        # Build folder structure: Company/Equipment/<Category>/<Equipment Name>
-        equipment_root = self._ensure_equipment_root_folder(self.company_id)
-        category_folder = self._ensure_category_folder(self.category_id, equipment_root)
-        
-        # Create equipment-specific folder
-        folder_name = f"{self.name} ({self.barcode or self.serial_number or self.id})"
-        
-        equipment_folder = FolderModel.sudo().create({
-            'name': folder_name,
-            'parent_id': category_folder.id,
-            'company_id': self.company_id.id,
-            'user_id': self.env.user.id,
-        })
-        
-        # Create subfolders for organization
-        subfolder_names = [
-            'Purchase Documents',
-            'Warranty & Certificates',
-           
-        ]
-        
-        for subfolder_name in subfolder_names:
-            FolderModel.sudo().create({
-                'name': subfolder_name,
-                'parent_id': equipment_folder.id,
-                'company_id': self.company_id.id,
-                'user_id': self.env.user.id,
-            })
-        
-        self.sudo().write({'equipment_folder_id': equipment_folder.id})
-        return equipment_folder
+        self._create_equipment_folders()
+        return self.equipment_folder_id
+
+    def _create_equipment_folders(self):
+        """Create the folders of the items of self that have none.
+
+        Company/Equipment/<Category>/<Equipment Name> plus its subfolders.
+        Roots are resolved once per company and category, then the item
+        folders and all their subfolders are created in two batches and
+        linked back in one UPDATE.
+        """
+        items = self.filtered(lambda item: not item.equipment_folder_id)
+        if not items:
+            return
+        Folder = self.env['custom.document.folder'].sudo()
+
+        roots, parents = {}, {}
+        for item in items:
+            key = (item.company_id, item.category_id)
+            if key not in parents:
+                if item.company_id not in roots:
+                    roots[item.company_id] = self._ensure_equipment_root_folder(item.company_id)
+                parents[key] = item._ensure_category_folder(item.category_id, roots[item.company_id])
+
+        folders = Folder.create([{
+            'name': item._get_folder_name(),
+            'parent_id': parents[(item.company_id, item.category_id)].id,
+            'company_id': item.company_id.id,
+            # the creator, also when the cron provisions them later
+            'user_id': item.create_uid.id or self.env.user.id,
+        } for item in items])
+        Folder.create([{
+            'name': name,
+            'parent_id': folder.id,
+            'company_id': folder.company_id.id,
+            'user_id': folder.user_id.id,
+        } for folder in folders for name in EQUIPMENT_SUBFOLDERS])
+
+        self.env.cr.execute("""
+            UPDATE equipment_item AS item
+               SET equipment_folder_id = link.folder_id
+              FROM unnest(%s, %s) AS link(item_id, folder_id)
+             WHERE item.id = link.item_id
+        """, (items.ids, folders.ids))
+        items.invalidate_recordset(['equipment_folder_id'])
+        items.modified(['equipment_folder_id'])
+
+    @api.model
+    def _cron_provision_equipment_folders(self, batch_size=FOLDER_BATCH_SIZE, auto_commit=True):
+        """Create the folders whose provisioning was deferred, in chunks.
+
+        The search runs with the default active_test, so archived items are
+        skipped; their flag stays set and a later run picks them up once they
+        are restored.
+        """
+        Item = self.sudo()
+        while True:
+            items = Item.search([('folder_provisioning_pending', '=', True)], limit=batch_size, order='id')
+            if not items:
+                break
+            items._create_equipment_folders()
+            items.write({'folder_provisioning_pending': False})
+            if auto_commit:
+                self.env.cr.commit()
 
     def _update_folder_name(self):
         """Update folder name when equipment name or barcode changes"""
         self.ensure_one()
         if self.equipment_folder_id:
-            new_name = f"{self.name} ({self.barcode or self.serial_number or self.id})"
+            new_name = self._get_folder_name()
             if self.equipment_folder_id.name != new_name:
                 self.equipment_folder_id.sudo().write({'name': new_name})
 
+    # ---------- Availability ----------
+    def _filter_available(self, date_from, date_to):
+        """Items of self with no loan or approved reservation overlapping [date_from, date_to)."""
+        return self.browse(self.env['equipment.booking']._get_free_equipment_ids(self.ids, date_from, date_to))
+
+    # ---------- Barcode lookup ----------
+    @api.model
+    def _get_barcode_maps(self, company_ids):
+        """Return a {barcode: item id} map of the active items of each company.
+
+        Cached per worker and generation; the generation is read once for
+        all of them. A transaction that changed barcodes reads its own,
+        uncommitted state, which must not land in the cache.
+        """
+        if self.env.cr.precommit.data.get(BARCODE_GENERATION_PARAM):
+            self.flush_model(['barcode', 'active', 'company_id'])
+            return [self._read_barcode_map(company_id) for company_id in company_ids]
+        generation = self._get_barcode_generation()
+        return [self._get_cached_barcode_map(company_id, generation) for company_id in company_ids]
+
+    @api.model
+    @tools.ormcache('company_id', 'generation')
+    def _get_cached_barcode_map(self, company_id, generation):
+        return self._read_barcode_map(company_id)
+
+    @api.model
+    def _read_barcode_map(self, company_id):
+        self.env.cr.execute("""
+            SELECT barcode, id
+              FROM equipment_item
+             WHERE barcode IS NOT NULL AND active
+               AND company_id IS NOT DISTINCT FROM %s
+        """, (company_id or None,))
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _get_barcode_generation(self):
+        # read in SQL: get_param() is itself cached and set_param() clears every cache
+        self.env.cr.execute("SELECT value FROM ir_config_parameter WHERE key = %s", (BARCODE_GENERATION_PARAM,))
+        row = self.env.cr.fetchone()
+        return row[0] if row else '0'
+
+    @api.model
+    def _bump_barcode_generation(self):
+        """Outdate the cached barcode maps of all workers once this transaction commits."""
+        self.env.cr.precommit.data[BARCODE_GENERATION_PARAM] = True
+        self.env.cr.execute("""
+            INSERT INTO ir_config_parameter (key, value, create_uid, create_date, write_uid, write_date)
+            VALUES (%(key)s, '1', %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC')
+            ON CONFLICT (key) DO UPDATE
+               SET value = (ir_config_parameter.value::bigint + 1)::text,
+                   write_uid = %(uid)s, write_date = now() at time zone 'UTC'
+        """, {'key': BARCODE_GENERATION_PARAM, 'uid': self.env.uid})
+
+    @api.model
+    def _lookup_barcodes(self, barcodes):
+        """Resolve barcodes to items readable by the user: {barcode: item}."""
+        maps = self._get_barcode_maps(self.env.companies.ids + [False])
+        ids_by_barcode = {}
+        for barcode in barcodes:
+            for barcode_map in maps:
+                item_id = barcode_map.get(barcode)
+                if item_id:
+                    ids_by_barcode[barcode] = item_id
+                    break
+        if not ids_by_barcode:
+            return {}
+        # the cache is shared by all users: access rules apply here
+        items = self.search([('id', 'in', list(ids_by_barcode.values()))])
+        readable = set(items.ids)
+        return {barcode: items.browse(item_id) for barcode, item_id in ids_by_barcode.items() if item_id in readable}
+
+    def _get_allowed_scan_actions(self):
+        """Actions the scanner may offer on self, mirroring the form buttons."""
+        self.ensure_one()
+        is_manager = self.env.user.has_group('equipment_management.group_equipment_manager')
+        actions = []
+        if self.state in ('available', 'reserved') and self.holder_type == 'none':
+            actions.append('borrow')
+        if self.state == 'borrowed':
+            actions.append('return')
+        if is_manager:
+            if self.holder_type == 'none' and self.state not in ('borrowed', 'maintenance', 'retired', 'lost'):
+                actions.append('assign')
+            if self.holder_type != 'none' and self.state != 'borrowed':
+                actions.append('unassign')
+            actions.append('schedule_maintenance')
+        return actions
+
+    def _get_scan_payload(self):
+        """Compact status of self for the scanner, one dict per item."""
+        states = dict(self._fields['state']._description_selection(self.env))
+        payload = []
+        for item in self:
+            holder = item.custodian_id or item.employee_id or item.department_id or item.custodian_partner_id
+            payload.append({
+                'id': item.id,
+                'name': item.name,
+                'barcode': item.barcode,
+                'state': item.state,
+                'state_label': states.get(item.state),
+                'location': item.location_id.display_name or False,
+                'custodian': holder.display_name or False,
+                'actions': item._get_allowed_scan_actions(),
+            })
+        return payload
+
+    @api.model
+    def _process_scan_batch(self, scans, purpose=None, return_location_id=None):
+        """Check out / check in a batch of queued scans in the current transaction.
+
+        Each scan is a dict with ``uid`` (client id, makes resubmission
+        harmless), ``barcode``, ``action`` ('auto', 'borrow' or 'return') and
+        ``scanned_at``. Every scan runs in its own savepoint, so one failure
+        does not undo the others. Returns one result dict per scan.
+        """
+        Loan = self.env['equipment.loan']
+        now = fields.Datetime.now()
+        found = self._lookup_barcodes([scan.get('barcode') for scan in scans])
+        uids = [scan['uid'] for scan in scans if scan.get('uid')]
+        seen = set()
+        if uids:
+            done = Loan.sudo().search_read(
+                ['|', ('issue_scan_uid', 'in', uids), ('return_scan_uid', 'in', uids)],
+                ['issue_scan_uid', 'return_scan_uid'])
+            seen = {uid for row in done for uid in (row['issue_scan_uid'], row['return_scan_uid']) if uid}
+        return_location = self.env['equipment.location'].browse(return_location_id or [])
+
+        results = []
+        for scan in scans:
+            uid, barcode = scan.get('uid'), scan.get('barcode')
+            result = {'uid': uid, 'barcode': barcode, 'status': 'done', 'action': scan.get('action') or 'auto'}
+            results.append(result)
+            item = found.get(barcode)
+            if not item:
+                result.update(status='error', message=_('No equipment found with barcode: %s') % barcode)
+                continue
+            if uid and uid in seen:
+                result.update(status='duplicate', item=item._get_scan_payload()[0])
+                continue
+            try:
+                scanned_at = min(fields.Datetime.to_datetime(scan.get('scanned_at')) or now, now)
+            except ValueError:
+                scanned_at = now
+            action = result['action']
+            if action == 'auto':
+                action = 'return' if item.state == 'borrowed' else 'borrow'
+            try:
+                with self.env.cr.savepoint():
+                    if action == 'return':
+                        loan = item.active_loan_id or Loan.search(
+                            [('equipment_id', '=', item.id), ('state', 'in', ['issued', 'overdue'])], limit=1)
+                        if not loan:
+                            raise UserError(_('No active loan found.'))
+                        loan._return_equipment(
+                            scanned_at, return_location or loan.return_location_id or item.location_id,
+                            item.condition, extra_vals={'return_scan_uid': uid or False})
+                    elif action == 'borrow':
+                        days = item.category_id.max_borrow_days or 1
+                        loan = Loan._create_quick_borrow(item, {
+                            'borrower_type': 'user',
+                            'borrower_id': self.env.user.id,
+                            'borrow_date': scanned_at,
+                            'due_date': scanned_at + timedelta(days=days),
+                            'purpose': purpose or _('Checked out by scan'),
+                            'issue_scan_uid': uid or False,
+                        })
+                    else:
+                        raise UserError(_('Unknown scan action: %s') % action)
+            except (UserError, ValidationError, AccessError) as e:
+                result.update(status='error', action=action, message=e.args[0] if e.args else str(e))
+                continue
+            if uid:
+                seen.add(uid)
+            result.update(
+                action=action,
+                status='pending' if loan.state == 'pending' else 'done',
+                loan=loan.display_name,
+                item=item._get_scan_payload()[0],
+            )
+        return results
+
+    # ---------- Barcode allocation ----------
+    @api.model
+    def _reserve_sequence_numbers(self, sequence, count):
+        """Return ``count`` formatted values of ``sequence``.
+
+        A standard sequence hands out the whole block in one nextval query;
+        date-range and no-gap sequences go through next_by_id.
+        """
+        if sequence.implementation != 'standard' or sequence.use_date_range:
+            return [sequence.next_by_id() for _i in range(count)]
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            ('ir_sequence_%03d' % sequence.id, count),
+        )
+        return [sequence.get_next_char(number) for number, in self.env.cr.fetchall()]
+
+    @api.model
+    def _allocate_barcodes(self, count, company_id, taken=()):
+        """Return ``count`` unused barcodes from the equipment.item sequence.
+
+        Values are reserved a block at a time and the block is checked
+        against existing barcodes (archived items included) in one query on
+        the (barcode, company_id) unique index; colliding values are
+        skipped and replaced from the next block.
+        """
+        sequence = self.env['ir.sequence'].sudo().search([
+            ('code', '=', 'equipment.item'),
+            ('company_id', 'in', [company_id, False]),
+        ], order='company_id', limit=1)
+        if not sequence:
+            raise UserError(_('Could not generate a unique barcode.'))
+        taken = set(taken)
+        barcodes = []
+        for _attempt in range(BARCODE_ALLOCATION_ATTEMPTS):
+            needed = count - len(barcodes)
+            if not needed:
+                break
+            candidates = [c for c in self._reserve_sequence_numbers(sequence, needed) if c not in taken]
+            if candidates:
+                self.env.cr.execute("""
+                    SELECT barcode
+                      FROM equipment_item
+                     WHERE company_id = %s AND barcode IN %s
+                """, (company_id, tuple(candidates)))
+                taken.update(row[0] for row in self.env.cr.fetchall())
+            free = [c for c in candidates if c not in taken]
+            taken.update(free)
+            barcodes += free
+        if len(barcodes) < count:
+            raise UserError(_('Could not generate a unique barcode.'))
+        return barcodes
+
     # ---------- Create / Write ----------
     @api.model_create_multi
     def create(self, vals_list):
+        missing_by_company = {}
+        taken_by_company = {}
         for vals in vals_list:
             if 'barcode' in vals and not (vals['barcode'] or '').strip():
                 vals['barcode'] = False
+            company_id = vals.get('company_id') or self.env.company.id
+            if vals.get('barcode'):
+                taken_by_company.setdefault(company_id, set()).add(vals['barcode'])
+            else:
+                missing_by_company.setdefault(company_id, []).append(vals)
 
-            if not vals.get('barcode'):
-                company_id = vals.get('company_id') or self.env.company.id
-                seq_env = self.env['ir.sequence'].with_context(force_company=company_id)
-
-                for _ in range(10):
-                    candidate = seq_env.next_by_code('equipment.item')
-                    if not candidate:
-                        break
-                    exists = self.search_count([
-                        ('company_id', '=', company_id),
-                        ('barcode', '=', candidate),
-                    ])
-                    if not exists:
-                        vals['barcode'] = candidate
-                        break
-                if not vals.get('barcode'):
-                    raise UserError(_('Could not generate a unique barcode.'))
+        # One block per company for the whole batch, e.g. an import
+        for company_id, company_vals in missing_by_company.items():
+            barcodes = self._allocate_barcodes(len(company_vals), company_id, taken_by_company.get(company_id, ()))
+            for vals, barcode in zip(company_vals, barcodes):
+                vals['barcode'] = barcode
 
+        for vals in vals_list:
             vals.setdefault('holder_type', 'none')
             for f in ('employee_id','department_id','custodian_partner_id','assigned_date'):
                 vals.setdefault(f, False)
@@ -290,12 +555,24 @@ class EquipmentItem(models.Model):
                 if ms:
                     vals['location_id'] = ms
         
+        # Create the folders of the new items, or leave them to the cron
+        defer = self.env.context.get('defer_equipment_folders')
+        if defer is None:
+            defer = self.env['ir.config_parameter'].sudo().get_param(DEFER_FOLDERS_PARAM)
+        if defer:
+            for vals in vals_list:
+                vals['folder_provisioning_pending'] = True
+
         records = super().create(vals_list)
-        
-        # Create folder for each new equipment item
-        for record in records:
-            record._create_equipment_folder()
-        
+        self._bump_barcode_generation()
+
+        if defer:
+            cron = self.env.ref('equipment_management.ir_cron_provision_equipment_folders', raise_if_not_found=False)
+            if cron:
+                cron._trigger()
+        else:
+            records._create_equipment_folders()
+
         return records
 
     def write(self, vals):
@@ -303,6 +580,8 @@ class EquipmentItem(models.Model):
             vals['barcode'] = False
 
         result = super().write(vals)
+        if vals.keys() & {'barcode', 'company_id', 'active'}:
+            self._bump_barcode_generation()
 
         # Update folder names if equipment name/barcode changed
         if 'name' in vals or 'barcode' in vals or 'serial_number' in vals:
@@ -329,6 +608,11 @@ class EquipmentItem(models.Model):
 
         return result
 
+    def unlink(self):
+        res = super().unlink()
+        self._bump_barcode_generation()
+        return res
+
     # ---------- Onchange ----------
     @api.onchange('holder_type')
     def _onchange_holder_type(self):
@@ -384,20 +668,17 @@ class EquipmentItem(models.Model):
     # ---------- Computes ----------
     @api.depends('barcode')
     def _compute_qr_code_image(self):
+        # one render per distinct barcode, also for bulk creates and the initial fill
+        images = render_qr_codes(item.barcode for item in self if item.barcode)
         for item in self:
-            if item.barcode and qrcode:
-                try:
-                    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-                    qr.add_data(item.barcode)
-                    qr.make(fit=True)
-                    img = qr.make_image(fill_color="black", back_color="white")
-                    buffer = io.BytesIO()
-                    img.save(buffer, format='PNG')
-                    item.qr_code_image = base64.b64encode(buffer.getvalue())
-                except Exception:
-                    item.qr_code_image = False
-            else:
-                item.qr_code_image = False
+            item.qr_code_image = images.get(item.barcode, False) if item.barcode else False
+
+    def _generate_missing_qr_codes(self):
+        """Render the images missing from the store, e.g. items created before qrcode was installed."""
+        missing = self.filtered(lambda item: item.barcode and not item.qr_code_image)
+        if missing and qrcode:
+            self.env.add_to_compute(self._fields['qr_code_image'], missing)
+            missing.flush_recordset(['qr_code_image'])
 
     @api.depends('warranty_end_date')
     def _compute_warranty_active(self):
@@ -482,10 +763,9 @@ class EquipmentItem(models.Model):
             self._create_equipment_folder()
         
         # Get "Purchase Documents" subfolder by default
-        purchase_folder = self.env['custom.document.folder'].sudo().search([
-            ('name', '=', 'Purchase Documents'),
-            ('parent_id', '=', self.equipment_folder_id.id),
-        ], limit=1)
+        purchase_folder = self.env['custom.document.folder'].sudo()._resolve_path(
+            ['Purchase Documents'], company=self.company_id,
+            parent=self.equipment_folder_id, create=False)
         
         default_folder = purchase_folder.id if purchase_folder else self.equipment_folder_id.id
         
@@ -635,7 +915,7 @@ class EquipmentItem(models.Model):
         return self.action_view_documents()
 
     def action_print_barcode_label(self):
-        self.ensure_one()
+        self._generate_missing_qr_codes()
         return self.env.ref('equipment_management.action_report_equipment_barcode_label').report_action(self)
 
     def action_scan_equipment(self):
@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError, UserError
+from odoo.exceptions import UserError
 from datetime import timedelta
 
+# States that hold the equipment (see equipment.booking)
+LOAN_BOOKING_STATES = ('approved', 'issued', 'overdue')
+# An item still out after its due date stays booked this far ahead of now;
+# the overdue cron pushes the booking forward at each run
+OVERDUE_HOLD = timedelta(days=2)
+
 
 class EquipmentLoan(models.Model):
     _name = 'equipment.loan'
@@ -189,6 +195,10 @@ class EquipmentLoan(models.Model):
         help='Whether this loan requires manager approval'
     )
     
+    # Client ids of the offline scans that checked the item out / in
+    issue_scan_uid = fields.Char(copy=False, readonly=True, index='btree_not_null')
+    return_scan_uid = fields.Char(copy=False, readonly=True, index='btree_not_null')
+
     # Issued/Returned By
     issued_by_id = fields.Many2one(
         'res.users',
@@ -250,8 +260,15 @@ class EquipmentLoan(models.Model):
                 vals['name'] = self.env['ir.sequence'].next_by_code('equipment.loan') or _('New')
 
         records = super(EquipmentLoan, self).create(vals_list)
+        records.filtered(lambda loan: loan.state in LOAN_BOOKING_STATES)._sync_bookings()
         return records
 
+    def write(self, vals):
+        res = super().write(vals)
+        if vals.keys() & {'equipment_id', 'borrow_date', 'due_date', 'state'}:
+            self._sync_bookings()
+        return res
+
     @api.depends('due_date', 'return_date', 'state')
     def _compute_is_overdue(self):
         """Check if loan is overdue"""
@@ -306,29 +323,36 @@ class EquipmentLoan(models.Model):
             days = self.equipment_id.category_id.max_borrow_days
             self.due_date = self.borrow_date + timedelta(days=days)
 
-    @api.constrains('equipment_id', 'borrow_date', 'due_date', 'state')
-    def _check_equipment_availability(self):
-        """Check if equipment is available for the requested period"""
-        for loan in self:
-            if loan.state in ['draft', 'pending']:
-                continue
-                
-            # Check for overlapping loans
-            overlapping = self.search([
-                ('equipment_id', '=', loan.equipment_id.id),
-                ('id', '!=', loan.id),
-                ('state', 'in', ['approved', 'issued']),
-                '|',
-                '&', ('borrow_date', '<=', loan.borrow_date), ('due_date', '>=', loan.borrow_date),
-                '&', ('borrow_date', '<=', loan.due_date), ('due_date', '>=', loan.due_date),
-            ])
-            
-            if overlapping:
-                raise ValidationError(_(
-                    'Equipment "%s" is already borrowed for the requested period.\n'
-                    'Conflicting loan: %s'
-                ) % (loan.equipment_id.name, overlapping[0].name))
-            
+    def _sync_bookings(self):
+        """Hold the item for approved, issued and overdue loans; free it otherwise.
+
+        A loan past its due date holds the item until it is returned: its
+        booking runs to ``OVERDUE_HOLD`` from now, or to the next booking of
+        the item, and is extended by the overdue cron. Raises if the period
+        overlaps another loan or an approved reservation.
+        """
+        now = fields.Datetime.now()
+        self.env['equipment.booking']._replace_bookings('loan_id', self, [{
+            'equipment_id': loan.equipment_id.id,
+            'date_from': loan.borrow_date,
+            'date_to': loan._get_booking_end(now),
+            'loan_id': loan.id,
+        } for loan in self if loan.state in LOAN_BOOKING_STATES])
+
+    def _get_booking_end(self, now):
+        self.ensure_one()
+        if self.state not in ('issued', 'overdue') or self.due_date >= now:
+            return self.due_date
+        Booking = self.env['equipment.booking']
+        Booking.flush_model(['equipment_id', 'date_from', 'loan_id'])
+        self.env.cr.execute("""
+            SELECT MIN(date_from)
+              FROM equipment_booking
+             WHERE equipment_id = %s AND date_from >= %s
+               AND loan_id IS DISTINCT FROM %s
+        """, (self.equipment_id.id, self.due_date, self.id))
+        next_start = self.env.cr.fetchone()[0]
+        return min(now + OVERDUE_HOLD, next_start) if next_start else now + OVERDUE_HOLD
 
     # Workflow Actions
     def action_submit_for_approval(self):
@@ -383,6 +407,105 @@ class EquipmentLoan(models.Model):
             loan._send_issue_notification()
 
 
+    @api.model
+    def _create_quick_borrow(self, equipment, vals):
+        """Create a loan of ``equipment`` and issue it unless it needs approval.
+
+        ``vals`` holds the borrower, dates and purpose; the rest comes from
+        the item. Shared by the quick borrow wizard and batch scans.
+        """
+        eq = equipment.sudo()
+        if eq.holder_type != 'none':
+            raise UserError(_('This item is assigned. Unassign it before borrowing.'))
+        if eq.state not in ['available', 'reserved']:
+            raise UserError(_('Equipment must be available or reserved to borrow.'))
+
+        loan = self.create(dict({
+            'equipment_id': eq.id,
+            'from_location_id': eq.location_id.id,
+            'return_location_id': eq.location_id.id,
+            'condition_out': eq.condition,
+        }, **vals))
+
+        if not getattr(loan, 'requires_approval', False):
+            loan.action_approve()
+            loan.action_issue()
+        else:
+            loan.action_submit_for_approval()
+        return loan
+
+    def _return_equipment(self, return_date, return_location, condition, damage_notes=False,
+                          damage_cost=0, returned_to=None, create_maintenance=False, extra_vals=None):
+        """Close the loan and put the item back in the matching state:
+           - maintenance -> state=maintenance, location=return_location
+           - assigned holder exists -> state=assigned, keep location (do NOT force Main Store)
+           - no holder -> state=available, location=return_location
+        """
+        self.ensure_one()
+        if self.state not in ['issued', 'overdue']:
+            raise UserError(_('Only issued or overdue loans can be returned.'))
+
+        # Prepare loan update with guards for optional fields
+        loan_updates = dict({
+            'state': 'returned',
+            'return_date': return_date,
+            'condition_return': condition,
+            'damage_notes': damage_notes,
+            'damage_cost': damage_cost,
+            'returned_to_id': (returned_to or self.env.user).id,
+        }, **(extra_vals or {}))
+        if 'actual_return_location_id' in self._fields:
+            loan_updates['actual_return_location_id'] = return_location.id
+        self.write(loan_updates)
+
+        eq = self.equipment_id.sudo()
+
+        # Decide equipment state after return
+        if create_maintenance:
+            new_state = 'maintenance'
+        elif eq.holder_type != 'none':
+            new_state = 'assigned'
+        else:
+            new_state = 'available'
+
+        # Build values; if assigned, keep current non-store location
+        values = {
+            'state': new_state,
+            'condition': condition,
+            'condition_notes': damage_notes or eq.condition_notes,
+        }
+        if new_state in ('available', 'maintenance'):
+            values['location_id'] = return_location.id
+
+        # Do not write unknown fields (e.g., custodian_id) unless they exist
+        if 'custodian_id' in eq._fields:
+            values['custodian_id'] = False
+
+        eq.write(values)
+
+        # Auto-create maintenance if requested (compatible with equipment_id or equipment_ids)
+        if create_maintenance:
+            Maint = self.env['equipment.maintenance']
+            vals = {
+                'maintenance_type': 'corrective',
+                'description': damage_notes or _('Maintenance required after return'),
+                'scheduled_date': fields.Date.today(),
+            }
+            if 'equipment_id' in Maint._fields:
+                vals['equipment_id'] = eq.id
+            elif 'equipment_ids' in Maint._fields:
+                vals['equipment_ids'] = [(4, eq.id)]
+            if 'state' in Maint._fields and 'scheduled' in dict(Maint._fields['state'].selection):
+                vals['state'] = 'scheduled'
+            Maint.create(vals)
+
+        # Notify + chatter
+        self._send_return_notification()
+        message = _('Equipment returned successfully.')
+        if damage_notes:
+            message += _('\n⚠️ Equipment has damage: %s') % damage_notes
+        self.message_post(body=message, subject=_('Equipment Returned'))
+
     def action_return(self):
         """Return equipment"""
         self.ensure_one()
@@ -456,7 +579,7 @@ class EquipmentLoan(models.Model):
     # Scheduled Actions
     @api.model
     def _cron_check_overdue_loans(self):
-        """Check for overdue loans and send notifications"""
+        """Check for overdue loans, send notifications and extend their bookings"""
         overdue_loans = self.search([
             ('state', '=', 'issued'),
             ('due_date', '<', fields.Datetime.now()),
@@ -470,6 +593,9 @@ class EquipmentLoan(models.Model):
                 partner_ids=loan.borrower_id.partner_id.ids
             )
 
+        # Loans already overdue: push the hold forward until they are returned
+        (self.search([('state', '=', 'overdue')]) - overdue_loans)._sync_bookings()
+
     @api.model
     def _cron_send_due_reminders(self):
         """Send reminders for loans due tomorrow"""
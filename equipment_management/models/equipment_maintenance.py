@@ -2,6 +2,9 @@
 
 from odoo import models, fields, api, _
 
+# States that hold the equipment (see equipment.booking)
+RESERVATION_BOOKING_STATES = ('approved',)
+
 
 class EquipmentMaintenance(models.Model):
     _name = 'equipment.maintenance'
@@ -207,8 +210,25 @@ class EquipmentReservation(models.Model):
 
         # super() must target EquipmentReservation, not EquipmentMaintenance
         records = super(EquipmentReservation, self).create(vals_list)
+        records.filtered(lambda res: res.state in RESERVATION_BOOKING_STATES)._sync_bookings()
         return records
 
+    def write(self, vals):
+        res = super().write(vals)
+        if vals.keys() & {'equipment_ids', 'from_date', 'to_date', 'state'}:
+            self._sync_bookings()
+        return res
+
+    def _sync_bookings(self):
+        """Hold every reserved item while the reservation is approved."""
+        self.env['equipment.booking']._replace_bookings('reservation_id', self, [{
+            'equipment_id': equipment.id,
+            'date_from': reservation.from_date,
+            'date_to': reservation.to_date,
+            'reservation_id': reservation.id,
+        } for reservation in self if reservation.state in RESERVATION_BOOKING_STATES
+            for equipment in reservation.equipment_ids])
+
 
     def action_submit(self):
         """Submit for approval"""
@@ -233,6 +253,8 @@ class EquipmentReservation(models.Model):
     def action_confirm(self):
         """Confirm pickup and create loans"""
         for reservation in self:
+            # Release the reservation's bookings first: the loans take them over
+            reservation.write({'state': 'confirmed'})
             # Create loan for each equipment
             for equipment in reservation.equipment_ids:
                 self.env['equipment.loan'].create({
@@ -244,5 +266,4 @@ class EquipmentReservation(models.Model):
                     'from_location_id': equipment.location_id.id,
                     'return_location_id': equipment.location_id.id,
                     'state': 'approved',
-                })
-            reservation.write({'state': 'confirmed'})
\ No newline at end of file
+                })
\ No newline at end of file
@@ -1,9 +1,20 @@
 /** @odoo-module **/
 
 import { registry } from "@web/core/registry";
+import { rpc } from "@web/core/network/rpc";
 import { useService } from "@web/core/utils/hooks";
 import { Component, useState, useRef, onMounted, onWillUnmount } from "@odoo/owl";
 
+// Scans queued in batch mode survive reloads and offline periods
+const SCAN_QUEUE_KEY = "equipment_management.scan_queue";
+
+function newScanUid() {
+    if (window.crypto && window.crypto.randomUUID) {
+        return window.crypto.randomUUID();
+    }
+    return `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+}
+
 /**
  * Equipment Barcode Scanner Component
  * Uses device camera to scan QR codes and barcodes
@@ -20,6 +31,13 @@ export class EquipmentBarcodeScanner extends Component {
             equipment: null,
             error: null,
             cameraActive: false,
+            // Batch mode: queue scans locally, submit them in one call
+            batchMode: false,
+            scanMode: "auto",
+            queue: this.loadQueue(),
+            results: [],
+            submitting: false,
+            online: navigator.onLine,
         });
 
         this.videoRef = useRef("video");
@@ -27,15 +45,103 @@ export class EquipmentBarcodeScanner extends Component {
         this.stream = null;
         this.scanInterval = null;
 
+        this.onOnline = () => {
+            this.state.online = true;
+            if (this.state.queue.length) {
+                this.notification.add(
+                    `Back online: ${this.state.queue.length} queued scan(s) ready to submit`,
+                    { type: "info" }
+                );
+            }
+        };
+        this.onOffline = () => {
+            this.state.online = false;
+        };
+
         onMounted(() => {
+            window.addEventListener("online", this.onOnline);
+            window.addEventListener("offline", this.onOffline);
             this.startCamera();
         });
 
         onWillUnmount(() => {
+            window.removeEventListener("online", this.onOnline);
+            window.removeEventListener("offline", this.onOffline);
             this.stopCamera();
         });
     }
 
+    /**
+     * Scan queue (batch mode)
+     */
+    loadQueue() {
+        try {
+            return JSON.parse(window.localStorage.getItem(SCAN_QUEUE_KEY) || "[]");
+        } catch {
+            return [];
+        }
+    }
+
+    saveQueue() {
+        window.localStorage.setItem(SCAN_QUEUE_KEY, JSON.stringify(this.state.queue));
+    }
+
+    queueScan(barcode) {
+        const action = this.state.scanMode;
+        if (this.state.queue.some((scan) => scan.barcode === barcode && scan.action === action)) {
+            this.notification.add(`${barcode} is already queued`, { type: "warning" });
+            return;
+        }
+        this.state.queue.push({
+            uid: newScanUid(),
+            barcode,
+            action,
+            // UTC, in the server datetime format
+            scanned_at: new Date().toISOString().replace("T", " ").slice(0, 19),
+        });
+        this.saveQueue();
+        this.playSuccessSound();
+    }
+
+    removeScan(uid) {
+        this.state.queue = this.state.queue.filter((scan) => scan.uid !== uid);
+        this.saveQueue();
+    }
+
+    clearQueue() {
+        this.state.queue = [];
+        this.saveQueue();
+    }
+
+    async submitQueue() {
+        if (!this.state.queue.length || this.state.submitting) {
+            return;
+        }
+        this.state.submitting = true;
+        const scans = [...this.state.queue];
+        try {
+            const { results } = await rpc("/equipment/scan/submit", { scans });
+            // every scan got an answer; failed ones are listed in the results
+            const answered = new Set(results.map((result) => result.uid));
+            this.state.queue = this.state.queue.filter((scan) => !answered.has(scan.uid));
+            this.saveQueue();
+            this.state.results = results;
+            const failed = results.filter((result) => result.status === "error").length;
+            this.notification.add(
+                `${results.length - failed} scan(s) processed, ${failed} failed`,
+                { type: failed ? "warning" : "success" }
+            );
+        } catch (error) {
+            console.error("Submit error:", error);
+            this.notification.add(
+                `Could not submit, ${scans.length} scan(s) kept in the queue`,
+                { type: "danger" }
+            );
+        } finally {
+            this.state.submitting = false;
+        }
+    }
+
     /**
      * Start camera and begin scanning
      */
@@ -146,17 +252,23 @@ export class EquipmentBarcodeScanner extends Component {
         this.state.scanning = true;
         this.state.lastScanned = barcode;
 
+        if (this.state.batchMode) {
+            // no round trip: works offline, submitted later in one call
+            this.queueScan(barcode);
+            setTimeout(() => {
+                this.state.scanning = false;
+                this.state.lastScanned = null;
+            }, 1500);
+            return;
+        }
+
         try {
-            // Search for equipment by barcode
-            const equipment = await this.orm.searchRead(
-                "equipment.item",
-                [['barcode', '=', barcode]],
-                ['name', 'state', 'category_id', 'location_id', 'custodian_id', 'barcode'],
-                { limit: 1 }
-            );
+            // Resolve the barcode through the cached lookup route
+            const result = await rpc("/equipment/scan/lookup", { barcodes: [barcode] });
+            const equipment = result.items[barcode];
 
-            if (equipment.length > 0) {
-                this.state.equipment = equipment[0];
+            if (equipment) {
+                this.state.equipment = equipment;
                 this.state.error = null;
                 
                 // Play success sound
@@ -164,13 +276,13 @@ export class EquipmentBarcodeScanner extends Component {
                 
                 // Show notification
                 this.notification.add(
-                    `Found: ${equipment[0].name}`,
+                    `Found: ${equipment.name}`,
                     { type: "success" }
                 );
 
                 // Auto-open equipment after 2 seconds
                 setTimeout(() => {
-                    this.openEquipment(equipment[0].id);
+                    this.openEquipment(equipment.id);
                 }, 2000);
             } else {
                 this.state.equipment = null;
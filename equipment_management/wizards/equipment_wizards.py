@@ -60,66 +60,15 @@ class EquipmentLoanReturnWizard(models.TransientModel):
         if not self.loan_id or self.loan_id.state not in ['issued', 'overdue']:
             raise UserError(_('Only issued or overdue loans can be returned.'))
 
-        # Prepare loan update with guards for optional fields
-        loan_updates = {
-            'state': 'returned',
-            'return_date': self.return_date,
-            'condition_return': self.condition_return,
-            'damage_notes': self.damage_notes if self.has_damage else False,
-            'damage_cost': self.damage_cost if self.has_damage else 0,
-            'returned_to_id': self.returned_to_id.id,
-        }
-        if 'actual_return_location_id' in self.loan_id._fields:
-            loan_updates['actual_return_location_id'] = self.return_location_id.id
-        self.loan_id.write(loan_updates)
-
-        eq = self.equipment_id.sudo()
-
-        # Decide equipment state after return
-        if self.create_maintenance:
-            new_state = 'maintenance'
-        elif eq.holder_type != 'none':
-            new_state = 'assigned'
-        else:
-            new_state = 'available'
-
-        # Build values; if assigned, keep current non-store location
-        values = {
-            'state': new_state,
-            'condition': self.condition_return,
-            'condition_notes': self.damage_notes if self.has_damage else eq.condition_notes,
-        }
-        if new_state in ('available', 'maintenance'):
-            values['location_id'] = self.return_location_id.id
-
-        # Do not write unknown fields (e.g., custodian_id) unless they exist
-        if 'custodian_id' in eq._fields:
-            values['custodian_id'] = False
-
-        eq.write(values)
-
-        # Auto-create maintenance if requested (compatible with equipment_id or equipment_ids)
-        if self.create_maintenance:
-            Maint = self.env['equipment.maintenance']
-            vals = {
-                'maintenance_type': 'corrective',
-                'description': self.damage_notes or _('Maintenance required after return'),
-                'scheduled_date': fields.Date.today(),
-            }
-            if 'equipment_id' in Maint._fields:
-                vals['equipment_id'] = eq.id
-            elif 'equipment_ids' in Maint._fields:
-                vals['equipment_ids'] = [(4, eq.id)]
-            if 'state' in Maint._fields and 'scheduled' in dict(Maint._fields['state'].selection):
-                vals['state'] = 'scheduled'
-            Maint.create(vals)
-
-        # Notify + chatter
-        self.loan_id._send_return_notification()
-        message = _('Equipment returned successfully.')
-        if self.has_damage:
-            message += _('\n⚠️ Equipment has damage: %s') % self.damage_notes
-        self.loan_id.message_post(body=message, subject=_('Equipment Returned'))
+        self.loan_id._return_equipment(
+            self.return_date,
+            self.return_location_id,
+            self.condition_return,
+            damage_notes=self.damage_notes if self.has_damage else False,
+            damage_cost=self.damage_cost if self.has_damage else 0,
+            returned_to=self.returned_to_id,
+            create_maintenance=self.create_maintenance,
+        )
 
         return {
             'type': 'ir.actions.act_window',
@@ -227,21 +176,11 @@ class EquipmentBorrowWizard(models.TransientModel):
     def action_confirm_borrow(self):
         self.ensure_one()
 
-        eq = self.equipment_id.sudo()
-        if eq.holder_type != 'none':
-            raise UserError(_('This item is assigned. Unassign it before borrowing.'))
-        if eq.state not in ['available', 'reserved']:
-            raise UserError(_('Equipment must be available or reserved to borrow.'))
-
         loan_vals = {
-            'equipment_id': eq.id,
             'borrower_type': self.borrower_type,
             'borrow_date': self.borrow_date,
             'due_date': self.due_date,
             'purpose': self.purpose,
-            'from_location_id': eq.location_id.id,
-            'return_location_id': eq.location_id.id,
-            'condition_out': eq.condition,
         }
         if self.borrower_type == 'user':
             loan_vals['borrower_id'] = (self.borrower_id or self.env.user).id
@@ -258,13 +197,7 @@ class EquipmentBorrowWizard(models.TransientModel):
                 raise ValidationError(_('Please select the External borrower.'))
             loan_vals['borrower_partner_id'] = self.borrower_partner_id.id
 
-        loan = self.env['equipment.loan'].create(loan_vals)
-
-        if not getattr(loan, 'requires_approval', False):
-            loan.action_approve()
-            loan.action_issue()
-        else:
-            loan.action_submit_for_approval()
+        loan = self.env['equipment.loan']._create_quick_borrow(self.equipment_id, loan_vals)
 
         return {
             'type': 'ir.actions.act_window',